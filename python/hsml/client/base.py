@@ -156,6 +156,56 @@ class Client(ABC):
                 return None
             return response.json()
 
+    def _configure_transfers(
+        self, upload_concurrency, chunk_size, download_concurrency=1
+    ):
+        """Configure file transfers issued through this client.
+
+        The connection pool of the session is sized to the requested concurrency, so
+        that concurrent chunk requests reuse their connections instead of discarding them.
+
+        :param upload_concurrency: number of chunk uploads to keep in flight
+        :type upload_concurrency: int
+        :param chunk_size: flow chunk size in bytes or a `ChunkSizeTuner`
+        :type chunk_size: int or ChunkSizeTuner
+        :param download_concurrency: number of byte ranges to download concurrently
+        :type download_concurrency: int
+        """
+        self._upload_concurrency = upload_concurrency
+        self._chunk_size = chunk_size
+        self._download_concurrency = download_concurrency
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=max(
+                upload_concurrency,
+                download_concurrency,
+                requests.adapters.DEFAULT_POOLSIZE,
+            )
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def _configure_cache(self, model_cache):
+        """Configure the cache of model versions downloaded through this client.
+
+        :param model_cache: cache of model versions, or `None` to disable caching
+        :type model_cache: ModelCache
+        """
+        self._model_cache = model_cache
+
+    def _configure_progress(self, progress_callback, progress_interval):
+        """Configure the progress reporting of transfers issued through this client.
+
+        :param progress_callback: function called with a `TransferEvent`, or `None` to
+            report no progress
+        :type progress_callback: callable
+        :param progress_interval: minimum number of seconds between two events of a
+            transfer
+        :type progress_interval: float
+        """
+        self._progress_callback = progress_callback
+        self._progress_interval = progress_interval
+
     def _close(self):
         """Closes a client. Can be implemented for clean up purposes, not mandatory."""
         self._connected = False
@@ -19,7 +19,11 @@ class RestAPIError(Exception):
     """REST Exception encapsulating the response object and url."""
 
     def __init__(self, url, response):
-        error_object = response.json()
+        try:
+            error_object = response.json()
+        except ValueError:
+            # gateways and proxies answer with non-json bodies, e.g. on a 502
+            error_object = {}
         message = (
             "Metadata operation error: (url: {}). Server response: \n"
             "HTTP code: {}, HTTP reason: {}, error code: {}, error msg: {}, user "
@@ -16,17 +16,31 @@
 
 import os
 
+from typing import Callable, Union
 from requests.exceptions import ConnectionError
 
 from hsml.decorators import connected, not_connected
 from hsml import client
-from hsml.core import models_api, model_registry_api
+from hsml.core import (
+    models_api,
+    model_registry_api,
+    chunk_size_tuner,
+    model_cache,
+    transfer_progress,
+)
 
 AWS_DEFAULT_REGION = "default"
 HOPSWORKS_PORT_DEFAULT = 443
 SECRETS_STORE_DEFAULT = "parameterstore"
 HOSTNAME_VERIFICATION_DEFAULT = True
 CERT_FOLDER_DEFAULT = "hops"
+UPLOAD_CONCURRENCY_DEFAULT = 1
+CHUNK_SIZE_DEFAULT = 1048576
+DOWNLOAD_CONCURRENCY_DEFAULT = 1
+CACHE_MAX_SIZE_DEFAULT = 10737418240
+CHUNK_SIZE_AUTO = "auto"
+PROGRESS_INTERVAL_DEFAULT = 1.0
+PROGRESS_CALLBACK_PRINT = "print"
 
 
 class Connection:
@@ -100,6 +114,25 @@ class Connection:
         api_key_value: API Key as string, if provided, `secrets_store` will be ignored`,
             however, this should be used with care, especially if the used notebook or
             job script is accessible by multiple parties. Defaults to `None`.
+        upload_concurrency: Number of file chunks to upload concurrently when saving
+            models, defaults to `1`.
+        chunk_size: Size in bytes of the chunks in which files are transferred,
+            `"auto"` to tune it to the measured throughput between 256 KiB and 64 MiB,
+            or a `hsml.core.chunk_size_tuner.ChunkSizeTuner` to tune it within the
+            bounds it was created with, defaults to `1048576`.
+        download_concurrency: Number of byte ranges of a file to download
+            concurrently, when the server supports range requests, defaults to `1`.
+        cache_dir: Local directory to cache downloaded model versions in, so that
+            downloading a version again returns the cached files. Defaults to `None`,
+            which disables the cache.
+        cache_max_size: Maximum size in bytes of the model cache, least recently used
+            model versions are evicted beyond it, defaults to `10737418240` (10 GiB).
+        progress_callback: Function called with a `TransferEvent` reporting the bytes
+            transferred, throughput and chunk latency of uploads, downloads and archive
+            operations, or `"print"` to print the events. Defaults to `None`, which
+            reports no progress.
+        progress_interval: Minimum number of seconds between two progress events of a
+            transfer, its last event is always reported. Defaults to `1.0`.
 
     # Returns
         `Connection`. Model Registry connection handle to perform operations on a
@@ -119,6 +152,15 @@ class Connection:
         cert_folder: str = CERT_FOLDER_DEFAULT,
         api_key_file: str = None,
         api_key_value: str = None,
+        upload_concurrency: int = UPLOAD_CONCURRENCY_DEFAULT,
+        chunk_size: Union[
+            int, str, chunk_size_tuner.ChunkSizeTuner
+        ] = CHUNK_SIZE_DEFAULT,
+        download_concurrency: int = DOWNLOAD_CONCURRENCY_DEFAULT,
+        cache_dir: str = None,
+        cache_max_size: int = CACHE_MAX_SIZE_DEFAULT,
+        progress_callback: Union[Callable, str] = None,
+        progress_interval: float = PROGRESS_INTERVAL_DEFAULT,
     ):
         self._host = host
         self._port = port
@@ -131,6 +173,13 @@ class Connection:
         self._cert_folder = cert_folder
         self._api_key_file = api_key_file
         self._api_key_value = api_key_value
+        self._upload_concurrency = upload_concurrency
+        self._chunk_size = chunk_size
+        self._download_concurrency = download_concurrency
+        self._cache_dir = cache_dir
+        self._cache_max_size = cache_max_size
+        self._progress_callback = progress_callback
+        self._progress_interval = progress_interval
         self._connected = False
         self._models_api = models_api.ModelsApi()
         self._model_registry_api = model_registry_api.ModelRegistryApi()
@@ -186,6 +235,26 @@ class Connection:
             else:
                 client.init("hopsworks")
 
+            if self._chunk_size == CHUNK_SIZE_AUTO:
+                chunk_size = chunk_size_tuner.ChunkSizeTuner()
+            else:
+                chunk_size = self._chunk_size
+            client.get_instance()._configure_transfers(
+                self._upload_concurrency, chunk_size, self._download_concurrency
+            )
+            client.get_instance()._configure_cache(
+                model_cache.ModelCache(self._cache_dir, self._cache_max_size)
+                if self._cache_dir is not None
+                else None
+            )
+            if self._progress_callback == PROGRESS_CALLBACK_PRINT:
+                progress_callback = transfer_progress.print_progress
+            else:
+                progress_callback = self._progress_callback
+            client.get_instance()._configure_progress(
+                progress_callback, self._progress_interval
+            )
+
             self._models_api = models_api.ModelsApi()
         except (TypeError, ConnectionError):
             self._connected = False
@@ -219,6 +288,15 @@ class Connection:
         cert_folder: str = CERT_FOLDER_DEFAULT,
         api_key_file: str = None,
         api_key_value: str = None,
+        upload_concurrency: int = UPLOAD_CONCURRENCY_DEFAULT,
+        chunk_size: Union[
+            int, str, chunk_size_tuner.ChunkSizeTuner
+        ] = CHUNK_SIZE_DEFAULT,
+        download_concurrency: int = DOWNLOAD_CONCURRENCY_DEFAULT,
+        cache_dir: str = None,
+        cache_max_size: int = CACHE_MAX_SIZE_DEFAULT,
+        progress_callback: Union[Callable, str] = None,
+        progress_interval: float = PROGRESS_INTERVAL_DEFAULT,
     ):
         """Connection factory method, accessible through `hsml.connection()`."""
         return cls(
@@ -233,6 +311,13 @@ class Connection:
             cert_folder,
             api_key_file,
             api_key_value,
+            upload_concurrency,
+            chunk_size,
+            download_concurrency,
+            cache_dir,
+            cache_max_size,
+            progress_callback,
+            progress_interval,
         )
 
     @property
@@ -325,6 +410,84 @@ class Connection:
     def api_key_value(self, api_key_value):
         self._api_key_value = api_key_value
 
+    @property
+    def upload_concurrency(self):
+        return self._upload_concurrency
+
+    @upload_concurrency.setter
+    @not_connected
+    def upload_concurrency(self, upload_concurrency):
+        self._upload_concurrency = upload_concurrency
+
+    @property
+    def chunk_size(self):
+        chunk_size = (
+            client.get_instance()._chunk_size if self._connected else self._chunk_size
+        )
+        if isinstance(chunk_size, chunk_size_tuner.ChunkSizeTuner):
+            # report the best chunk size found so far, so it can be pinned
+            return chunk_size.best_chunk_size
+        return chunk_size
+
+    @chunk_size.setter
+    @not_connected
+    def chunk_size(self, chunk_size):
+        self._chunk_size = chunk_size
+
+    @property
+    def download_concurrency(self):
+        return self._download_concurrency
+
+    @download_concurrency.setter
+    @not_connected
+    def download_concurrency(self, download_concurrency):
+        self._download_concurrency = download_concurrency
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @cache_dir.setter
+    @not_connected
+    def cache_dir(self, cache_dir):
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_max_size(self):
+        return self._cache_max_size
+
+    @cache_max_size.setter
+    @not_connected
+    def cache_max_size(self, cache_max_size):
+        self._cache_max_size = cache_max_size
+
+    @property
+    def progress_callback(self):
+        return self._progress_callback
+
+    @progress_callback.setter
+    @not_connected
+    def progress_callback(self, progress_callback):
+        self._progress_callback = progress_callback
+
+    @property
+    def progress_interval(self):
+        return self._progress_interval
+
+    @progress_interval.setter
+    @not_connected
+    def progress_interval(self, progress_interval):
+        self._progress_interval = progress_interval
+
+    @property
+    @connected
+    def model_cache(self):
+        """Cache of downloaded model versions, to pin, unpin or remove entries.
+
+        `None` if the connection has no `cache_dir`.
+        """
+        return client.get_instance()._model_cache
+
     def __enter__(self):
         self.connect()
         return self
@@ -0,0 +1,129 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import threading
+
+
+class ChunkSizeTuner:
+    """Throughput-adaptive flow chunk size.
+
+    The tuner measures the latency of every chunk of a transfer and hill-climbs the
+    chunk size between `min_chunk_size` and `max_chunk_size`: the size keeps doubling
+    (or halving) as long as the throughput per request improves, and turns around when
+    it drops. Since the server reassembles a flow upload from a fixed chunk size, a new
+    size takes effect at the next transfer.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1048576
+    DEFAULT_MIN_CHUNK_SIZE = 262144
+    DEFAULT_MAX_CHUNK_SIZE = 67108864
+    MIN_SAMPLES = 4
+
+    def __init__(
+        self,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        min_chunk_size=DEFAULT_MIN_CHUNK_SIZE,
+        max_chunk_size=DEFAULT_MAX_CHUNK_SIZE,
+    ):
+        if not min_chunk_size <= chunk_size <= max_chunk_size:
+            raise ValueError(
+                "chunk_size {} is not within bounds [{}, {}]".format(
+                    chunk_size, min_chunk_size, max_chunk_size
+                )
+            )
+        self._chunk_size = chunk_size
+        self._min_chunk_size = min_chunk_size
+        self._max_chunk_size = max_chunk_size
+        self._growing = True
+        self._last_throughput = None
+        self._best_throughput = None
+        self._best_chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._reset_samples()
+
+    def _reset_samples(self):
+        self._samples = 0
+        self._bytes = 0
+        self._seconds = 0.0
+
+    def record(self, num_bytes, seconds):
+        """Record the latency of a single chunk request.
+
+        :param num_bytes: size of the chunk
+        :type num_bytes: int
+        :param seconds: latency of the request
+        :type seconds: float
+        """
+        with self._lock:
+            self._samples += 1
+            self._bytes += num_bytes
+            self._seconds += seconds
+
+    def tune(self):
+        """Pick the chunk size for the next transfer from the recorded samples.
+
+        Transfers with less than `MIN_SAMPLES` chunks are too short to measure and
+        leave the chunk size unchanged.
+
+        :return: chunk size for the next transfer
+        :rtype: int
+        """
+        with self._lock:
+            if self._samples < self.MIN_SAMPLES or self._seconds <= 0:
+                self._reset_samples()
+                return self._chunk_size
+
+            throughput = self._bytes / self._seconds
+            self._reset_samples()
+
+            if self._best_throughput is None or throughput > self._best_throughput:
+                self._best_throughput = throughput
+                self._best_chunk_size = self._chunk_size
+
+            if self._last_throughput is not None and throughput < self._last_throughput:
+                self._growing = not self._growing
+            self._last_throughput = throughput
+
+            if self._growing and self._chunk_size * 2 > self._max_chunk_size:
+                self._growing = False
+            elif not self._growing and self._chunk_size // 2 < self._min_chunk_size:
+                self._growing = True
+
+            if self._growing:
+                self._chunk_size = min(self._chunk_size * 2, self._max_chunk_size)
+            else:
+                self._chunk_size = max(self._chunk_size // 2, self._min_chunk_size)
+            return self._chunk_size
+
+    @property
+    def chunk_size(self):
+        """Chunk size to use for the next transfer."""
+        return self._chunk_size
+
+    @property
+    def best_chunk_size(self):
+        """Chunk size with the highest throughput observed so far."""
+        return self._best_chunk_size
+
+    @property
+    def min_chunk_size(self):
+        """Lower bound of the chunk size."""
+        return self._min_chunk_size
+
+    @property
+    def max_chunk_size(self):
+        """Upper bound of the chunk size."""
+        return self._max_chunk_size
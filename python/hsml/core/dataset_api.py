@@ -14,13 +14,27 @@
 #   limitations under the License.
 #
 
+import hashlib
 import math
+import mmap
 import os
 import json
+import re
 from hsml.client.exceptions import RestAPIError
 import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
 
 from hsml import client, tag
+from hsml.core import (
+    upload_journal,
+    chunk_size_tuner,
+    flow_upload,
+    poller,
+    retry_budget,
+    resumable_download,
+    transfer_progress,
+)
 
 
 class DatasetApi:
@@ -28,45 +42,223 @@ class DatasetApi:
         pass
 
     DEFAULT_FLOW_CHUNK_SIZE = 1048576
+    DEFAULT_UPLOAD_RETRIES = 10
+    DEFAULT_DOWNLOAD_PART_SIZE = 33554432
+    DEFAULT_DOWNLOAD_RETRIES = 10
+    PARTIAL_DOWNLOAD_SUFFIX = ".partial"
 
-    def upload(self, local_abs_path, upload_path):
+    def upload(
+        self,
+        local_abs_path,
+        upload_path,
+        max_concurrency=None,
+        resumable=False,
+        chunk_size=None,
+        retries=DEFAULT_UPLOAD_RETRIES,
+    ):
         """Upload file/directory in local path to datasets
 
+        Chunks are uploaded through the flow protocol, keeping up to `max_concurrency`
+        chunk requests in flight. The server reassembles the file from the chunk numbers,
+        so chunks can be acknowledged in any order.
+
+        Resumable uploads record acknowledged chunks in a local journal. When an upload
+        of the same file is retried, journaled chunks that the server still has are
+        skipped. The journal is removed once the upload completes.
+
+        If `chunk_size` is a `ChunkSizeTuner`, the latency of every chunk is recorded and
+        the tuner picks the chunk size of the next transfer once this one completes.
+
+        Chunk requests failing with a connection error or a transient status code are
+        retried with exponential backoff, re-sending only the failed chunk. `retries`
+        bounds the number of retries over all the chunks of the upload.
+
         :param local_abs_path: local path to upload
         :type local_abs_path: str
         :param upload_path: path in datasets to upload
         :type upload_path: str
+        :param max_concurrency: number of chunks to upload concurrently, defaults to the
+            upload concurrency of the connection
+        :type max_concurrency: int
+        :param resumable: whether to journal acknowledged chunks and resume from them
+        :type resumable: bool
+        :param chunk_size: flow chunk size in bytes or a `ChunkSizeTuner`, defaults to
+            the chunk size of the connection
+        :type chunk_size: int or ChunkSizeTuner
+        :param retries: number of failed chunk requests to retry over the upload
+        :type retries: int
+        :return: chunk size used for the upload
+        :rtype: int
         """
 
         size = os.path.getsize(local_abs_path)
 
         _, file_name = os.path.split(local_abs_path)
 
-        num_chunks = math.ceil(size / self.DEFAULT_FLOW_CHUNK_SIZE)
+        with open(local_abs_path, "rb") as f, self.upload_stream(
+            upload_path,
+            file_name,
+            size,
+            max_concurrency=max_concurrency,
+            resumable=resumable,
+            chunk_size=chunk_size,
+            retries=retries,
+        ) as stream:
+            if size > 0:
+                # Chunks are memoryviews over the mapped file, so they are not copied
+                # on their way to the socket. The mapping is released once the last
+                # request referencing it is garbage collected.
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                for offset in range(0, size, stream.chunk_size):
+                    stream.write(view[offset : offset + stream.chunk_size])
+
+        return stream.chunk_size
+
+    def upload_stream(
+        self,
+        upload_path,
+        file_name,
+        size,
+        max_concurrency=None,
+        resumable=False,
+        chunk_size=None,
+        retries=DEFAULT_UPLOAD_RETRIES,
+    ):
+        """Open a stream uploading everything written to it to datasets.
 
-        base_params = self._get_flow_base_params(file_name, num_chunks, size)
+        The stream uploads full chunks while the caller is still producing the rest of
+        the file, so the file never needs to exist locally. Exactly `size` bytes have
+        to be written before the stream is closed.
 
-        chunk_number = 1
-        with open(local_abs_path, "rb") as f:
-            while True:
-                chunk = f.read(self.DEFAULT_FLOW_CHUNK_SIZE)
-                if not chunk:
-                    break
+        :param upload_path: path in datasets to upload
+        :type upload_path: str
+        :param file_name: name of the uploaded file
+        :type file_name: str
+        :param size: total size in bytes of the uploaded file
+        :type size: int
+        :param max_concurrency: number of chunks to upload concurrently, defaults to the
+            upload concurrency of the connection
+        :type max_concurrency: int
+        :param resumable: whether to journal acknowledged chunks and resume from them
+        :type resumable: bool
+        :param chunk_size: flow chunk size in bytes or a `ChunkSizeTuner`, defaults to
+            the chunk size of the connection
+        :type chunk_size: int or ChunkSizeTuner
+        :param retries: number of failed chunk requests to retry over the upload
+        :type retries: int
+        :return: write-only stream, to be used as a context manager
+        :rtype: FlowUploadStream
+        """
+
+        if max_concurrency is None:
+            max_concurrency = client.get_instance()._upload_concurrency
+
+        chunk_size, tuner = self._get_chunk_size(chunk_size)
+
+        num_chunks = max(math.ceil(size / chunk_size), 1)
+
+        base_params = self._get_flow_base_params(
+            upload_path, file_name, num_chunks, size, chunk_size
+        )
 
-                query_params = base_params
-                query_params["flowCurrentChunkSize"] = len(chunk)
-                query_params["flowChunkNumber"] = chunk_number
+        journal = None
+        if resumable:
+            try:
+                journal = upload_journal.UploadJournal(
+                    upload_path,
+                    base_params["flowIdentifier"],
+                    base_params["flowChunkSize"],
+                )
+            except OSError as e:
+                warnings.warn(
+                    "Could not open upload journal, upload will not be resumable: {}".format(
+                        e
+                    )
+                )
+            if journal is not None and journal.acknowledged_chunks > 0:
+                print(
+                    "Resuming upload of {}, {} of {} chunks were already sent.".format(
+                        file_name, journal.acknowledged_chunks, num_chunks
+                    )
+                )
 
-                self._upload_request(query_params, upload_path, file_name, chunk)
+        return flow_upload.FlowUploadStream(
+            self,
+            upload_path,
+            base_params,
+            max_concurrency,
+            journal=journal,
+            tuner=tuner,
+            retry_budget=retry_budget.RetryBudget(retries),
+            progress=self._get_progress("upload", upload_path + "/" + file_name, size),
+        )
 
-                chunk_number += 1
+    def _get_progress(self, kind, path, total=None):
+        """Progress of a transfer, reported to the progress callback of the client."""
+        _client = client.get_instance()
+        return transfer_progress.TransferProgress(
+            kind,
+            path,
+            _client._progress_callback,
+            _client._progress_interval,
+            total=total,
+        )
+
+    def _get_chunk_size(self, chunk_size):
+        """Resolve the chunk size of a transfer.
+
+        :param chunk_size: chunk size in bytes, a `ChunkSizeTuner` or `None` to use the
+            chunk size of the connection
+        :type chunk_size: int or ChunkSizeTuner
+        :return: chunk size in bytes and the tuner to record latencies with, if any
+        :rtype: tuple
+        """
+        if chunk_size is None:
+            chunk_size = client.get_instance()._chunk_size
+        if isinstance(chunk_size, chunk_size_tuner.ChunkSizeTuner):
+            return chunk_size.chunk_size, chunk_size
+        return chunk_size, None
+
+    def _upload_chunk(
+        self, params, path, file_name, chunk, journal, tuner, budget, progress
+    ):
+        """Upload a single chunk, skipping it if it was journaled and the server has it.
 
-    def _get_flow_base_params(self, file_name, num_chunks, size):
+        A failed chunk request is retried on its own as long as the retry budget lasts.
+        """
+        chunk_number = params["flowChunkNumber"]
+        if (
+            journal is not None
+            and journal.is_acknowledged(chunk_number, chunk)
+            and self._upload_chunk_exists(params, path)
+        ):
+            progress.update(len(chunk))
+            return
+
+        start = time.perf_counter()
+        budget.call(self._upload_request, params, path, file_name, chunk)
+        latency = time.perf_counter() - start
+        if tuner is not None:
+            tuner.record(len(chunk), latency)
+        progress.update(len(chunk), latency)
+
+        if journal is not None:
+            journal.acknowledge(chunk_number, chunk)
+
+    def _get_flow_base_params(
+        self, upload_path, file_name, num_chunks, size, chunk_size
+    ):
+        # files with the same name and size uploaded to different paths at the same time
+        # must not share a flow, while retries of an upload must resume the same flow
+        path_hash = hashlib.sha1(upload_path.encode("utf-8")).hexdigest()[:16]
         return {
             "templateId": -1,
-            "flowChunkSize": self.DEFAULT_FLOW_CHUNK_SIZE,
+            "flowChunkSize": chunk_size,
             "flowTotalSize": size,
-            "flowIdentifier": str(size) + "_" + file_name,
+            # the server lays out chunks by the chunk size of the first request of a flow
+            "flowIdentifier": "_".join(
+                [str(size), str(chunk_size), path_hash, file_name]
+            ),
             "flowFilename": file_name,
             "flowRelativePath": file_name,
             "flowTotalChunks": num_chunks,
@@ -77,19 +269,265 @@ class DatasetApi:
         _client = client.get_instance()
         path_params = ["project", _client._project_id, "dataset", "upload", path]
 
-        # Flow configuration params are sent as form data
-        _client._send_request(
-            "POST", path_params, data=params, files={"file": (file_name, chunk)}
-        )
+        # Flow configuration params are sent as form data, followed by the chunk
+        body = flow_upload.MultipartChunkBody(params, file_name, chunk)
+        headers = {"content-type": body.content_type}
+        _client._send_request("POST", path_params, headers=headers, data=body)
+
+    def _upload_chunk_exists(self, params, path):
+        """Ask the server whether it already received a chunk of a flow upload.
 
-    def download(self, path, local_path):
+        :param params: flow params of the chunk
+        :type params: dict
+        :param path: path in datasets the chunk is uploaded to
+        :type path: str
+        :return: boolean whether the server has the chunk
+        :rtype: bool
+        """
+        _client = client.get_instance()
+        path_params = ["project", _client._project_id, "dataset", "upload", path]
+        try:
+            with _client._send_request(
+                "GET", path_params, query_params=params, stream=True
+            ) as response:
+                return response.status_code == 200
+        except RestAPIError:
+            return False
+
+    def download(
+        self,
+        path,
+        local_path,
+        chunk_size=None,
+        max_concurrency=None,
+        part_size=DEFAULT_DOWNLOAD_PART_SIZE,
+        retries=DEFAULT_DOWNLOAD_RETRIES,
+    ):
         """Download file/directory on a path in datasets.
+
+        With a concurrency above one, the first request asks for the first `part_size`
+        bytes of the file only. If the server answers with a partial response, the local
+        file is preallocated and the remaining byte ranges are fetched concurrently,
+        keeping up to `max_concurrency` requests in flight. A server which does not
+        support range requests sends the whole file, which is then written sequentially.
+
+        The file is written to `local_path` with a `.partial` suffix and renamed once
+        complete. When a response breaks or fails with a transient error, the download
+        resumes from the last byte written with a range request, as long as the retry
+        budget lasts.
+
         :param path: path to download
         :type path: str
         :param local_path: path to download in datasets
         :type local_path: str
+        :param chunk_size: size in bytes of the chunks read from the response stream or
+            a `ChunkSizeTuner`, defaults to the chunk size of the connection
+        :type chunk_size: int or ChunkSizeTuner
+        :param max_concurrency: number of byte ranges to download concurrently, defaults
+            to the download concurrency of the connection
+        :type max_concurrency: int
+        :param part_size: size in bytes of the byte ranges
+        :type part_size: int
+        :param retries: number of failed requests to retry over the download
+        :type retries: int
+        """
+
+        chunk_size, _ = self._get_chunk_size(chunk_size)
+        if max_concurrency is None:
+            max_concurrency = client.get_instance()._download_concurrency
+
+        budget = retry_budget.RetryBudget(retries)
+        progress = self._get_progress("download", path)
+        partial_path = local_path + self.PARTIAL_DOWNLOAD_SUFFIX
+        try:
+            if max_concurrency <= 1:
+                with open(partial_path, "wb") as f:
+                    self._download_to(path, f, None, chunk_size, budget, progress)
+            else:
+                self._download_ranges(
+                    path,
+                    partial_path,
+                    chunk_size,
+                    max_concurrency,
+                    part_size,
+                    budget,
+                    progress,
+                )
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        os.replace(partial_path, local_path)
+        progress.done()
+
+    def download_stream(self, path, chunk_size=None, retries=DEFAULT_DOWNLOAD_RETRIES):
+        """Open a file in datasets for reading as it is downloaded.
+
+        The stream reads the file sequentially and resumes from the current offset when
+        the download breaks, as long as the retry budget lasts.
+
+        :param path: path to download
+        :type path: str
+        :param chunk_size: size in bytes of the chunks read from the response stream or
+            a `ChunkSizeTuner`, defaults to the chunk size of the connection
+        :type chunk_size: int or ChunkSizeTuner
+        :param retries: number of failed requests to retry over the download
+        :type retries: int
+        :return: read-only stream, to be used as a context manager
+        :rtype: ResumableDownloadStream
+        """
+        chunk_size, _ = self._get_chunk_size(chunk_size)
+        return resumable_download.ResumableDownloadStream(
+            self,
+            path,
+            chunk_size,
+            retry_budget.RetryBudget(retries),
+            progress=self._get_progress("download", path),
+        )
+
+    def read(self, path, retries=DEFAULT_DOWNLOAD_RETRIES):
+        """Read the content of a file in datasets into memory.
+
+        Meant for small files, nothing is written to the local filesystem.
+
+        :param path: path of the file to read
+        :type path: str
+        :param retries: number of failed requests to retry over the download
+        :type retries: int
+        :return: content of the file
+        :rtype: bytes
         """
+        with self.download_stream(path, retries=retries) as stream:
+            return stream.read()
 
+    def _download_ranges(
+        self,
+        path,
+        partial_path,
+        chunk_size,
+        max_concurrency,
+        part_size,
+        budget,
+        progress,
+    ):
+        """Download a file as concurrent byte ranges, if the server supports them."""
+        try:
+            response = budget.call(self._download_request, path, 0, part_size - 1)
+        except RestAPIError as e:
+            if e.response.status_code != 416:
+                raise
+            # an empty file has no byte range to satisfy
+            response = budget.call(self._download_request, path)
+
+        with open(partial_path, "wb") as f:
+            content_range = self._get_content_range(response)
+            if content_range is None or content_range[0] != 0:
+                # the server ignored the range and sends the whole file
+                self._download_to(path, f, None, chunk_size, budget, progress, response)
+                return
+            size = content_range[2]
+            progress.total = size
+            f.truncate(size)
+            self._download_to(
+                path, f, content_range[1], chunk_size, budget, progress, response
+            )
+
+        ranges = [
+            (start, min(start + part_size, size) - 1)
+            for start in range(part_size, size, part_size)
+        ]
+        if not ranges:
+            return
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = [
+                executor.submit(
+                    self._download_range,
+                    path,
+                    partial_path,
+                    start,
+                    end,
+                    chunk_size,
+                    budget,
+                    progress,
+                )
+                for start, end in ranges
+            ]
+            _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+        for future in futures:
+            if not future.cancelled() and future.exception() is not None:
+                raise future.exception()
+
+    def _download_range(
+        self, path, partial_path, start, end, chunk_size, budget, progress
+    ):
+        """Download a byte range of a file into its place in the local file."""
+        with open(partial_path, "r+b") as f:
+            f.seek(start)
+            self._download_to(path, f, end, chunk_size, budget, progress)
+
+    def _download_to(self, path, f, end, chunk_size, budget, progress, response=None):
+        """Write a file from the current position of `f` up to byte `end`.
+
+        The position of `f` is the verified offset of the download: every retry asks
+        for the bytes from there on, and checks that the server resumes at that offset.
+        If `end` is `None`, the file is written up to its end.
+
+        :param response: response already opened for the first attempt, if any
+        :type response: requests.Response
+        """
+        attempt = 0
+        while True:
+            offset = f.tell()
+            try:
+                if response is None:
+                    if offset == 0 and end is None:
+                        response = self._download_request(path)
+                    else:
+                        response = self._download_request(path, offset, end)
+                with response:
+                    content_range = self._get_content_range(response)
+                    if end is None:
+                        if offset > 0 and content_range is None:
+                            # the server can not resume, start over
+                            f.seek(0)
+                            f.truncate()
+                            progress.update(-offset)
+                        elif content_range is not None and content_range[0] != offset:
+                            raise IOError(
+                                "Requested {} from byte {}, but the server sent {}".format(
+                                    path, offset, response.headers["Content-Range"]
+                                )
+                            )
+                        self._write_response(response, f, chunk_size, progress)
+                    else:
+                        if content_range is None or content_range[:2] != (offset, end):
+                            raise IOError(
+                                "Requested bytes {}-{} of {}, but the server sent {}".format(
+                                    offset,
+                                    end,
+                                    path,
+                                    response.headers.get(
+                                        "Content-Range", "the whole file"
+                                    ),
+                                )
+                            )
+                        self._write_range(
+                            response, f, offset, end, chunk_size, progress
+                        )
+                return
+            except retry_budget.RetryBudget.CAUGHT_EXCEPTIONS as e:
+                budget.backoff(e, attempt)
+                attempt += 1
+                response = None
+
+    def _download_request(self, path, start=None, end=None):
+        """Open a streamed download of a file, or of a byte range of it.
+
+        If `end` is `None`, the range extends to the end of the file.
+        """
         _client = client.get_instance()
         path_params = [
             "project",
@@ -100,25 +538,62 @@ class DatasetApi:
             path,
         ]
         query_params = {"type": "DATASET"}
+        headers = None
+        if start is not None:
+            headers = {"Range": "bytes={}-{}".format(start, "" if end is None else end)}
+
+        return _client._send_request(
+            "GET", path_params, query_params=query_params, headers=headers, stream=True
+        )
+
+    def _get_content_range(self, response):
+        """Parse the range of a partial response.
 
-        with _client._send_request(
-            "GET", path_params, query_params=query_params, stream=True
-        ) as response:
-            with open(local_path, "wb") as f:
-                downloaded = 0
-                file_size = response.headers.get("Content-Length")
-                if not file_size:
-                    print("Downloading file ...", end=" ")
-                for chunk in response.iter_content(
-                    chunk_size=self.DEFAULT_FLOW_CHUNK_SIZE
-                ):
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if file_size:
-                        progress = round(downloaded / int(file_size) * 100, 3)
-                        print("Progress: " + str(progress) + "%")
-                if not file_size:
-                    print("Download complete")
+        :return: first byte, last byte and total size of the file, or `None` if the
+            response is not a partial response with a known total size
+        :rtype: tuple
+        """
+        if response.status_code != 206:
+            return None
+        match = re.match(
+            r"bytes (\d+)-(\d+)/(\d+)", response.headers.get("Content-Range", "")
+        )
+        if match is None:
+            return None
+        return tuple(int(group) for group in match.groups())
+
+    def _write_range(self, response, f, start, end, chunk_size, progress):
+        """Write the body of a partial response, checking that it is complete."""
+        written = 0
+        for chunk, latency in self._iter_chunks(response, chunk_size):
+            f.write(chunk)
+            written += len(chunk)
+            progress.update(len(chunk), latency)
+        if written != end - start + 1:
+            raise IOError(
+                "Download of bytes {}-{} ended after {} bytes".format(
+                    start, end, written
+                )
+            )
+
+    def _write_response(self, response, f, chunk_size, progress):
+        """Write the body of a response to a file sequentially from its position."""
+        file_size = response.headers.get("Content-Length")
+        if file_size and progress.total is None:
+            progress.total = f.tell() + int(file_size)
+        for chunk, latency in self._iter_chunks(response, chunk_size):
+            f.write(chunk)
+            progress.update(len(chunk), latency)
+
+    def _iter_chunks(self, response, chunk_size):
+        """Chunks of a response body, with the seconds spent waiting for each."""
+        chunks = response.iter_content(chunk_size=chunk_size)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, b"")
+            if not chunk:
+                return
+            yield chunk, time.perf_counter() - start
 
     def get(self, remote_path):
         """Get metadata about a path in datasets.
@@ -147,7 +622,7 @@ class DatasetApi:
         except RestAPIError:
             return False
 
-    def list(self, remote_path, sort_by=None, limit=1000):
+    def list(self, remote_path, sort_by=None, limit=1000, offset=0):
         """List all files in a directory in datasets.
 
         :param remote_path: path to list
@@ -156,15 +631,62 @@ class DatasetApi:
         :type sort_by: str
         :param limit: max number of returned files
         :type limit: int
+        :param offset: number of files to skip
+        :type offset: int
         """
         _client = client.get_instance()
         path_params = ["project", _client._project_id, "dataset", remote_path]
-        query_params = {"action": "listing", "sort_by": sort_by, "limit": limit}
+        query_params = {
+            "action": "listing",
+            "sort_by": sort_by,
+            "limit": limit,
+            "offset": offset,
+        }
         headers = {"content-type": "application/json"}
         return _client._send_request(
             "GET", path_params, headers=headers, query_params=query_params
         )
 
+    def list_files(self, remote_path, limit=1000):
+        """List all files and directories under a directory in datasets, recursively.
+
+        Directories are listed one page of `limit` entries at a time, and parents come
+        before their children.
+
+        :param remote_path: path to list
+        :type remote_path: str
+        :param limit: max number of files returned by a single listing request
+        :type limit: int
+        :return: relative path, using `/` as separator, whether it is a directory and
+            size in bytes, `None` if not reported, of every entry
+        :rtype: list
+        """
+        entries = []
+        pending = [""]
+        while pending:
+            relative_dir = pending.pop(0)
+            listed_path = (
+                remote_path + "/" + relative_dir if relative_dir else remote_path
+            )
+            offset = 0
+            while True:
+                listing = self.list(
+                    listed_path, sort_by="NAME:asc", limit=limit, offset=offset
+                )
+                items = listing.get("items", []) if listing else []
+                for item in items:
+                    name = os.path.basename(item["attributes"]["path"].rstrip("/"))
+                    relative_path = relative_dir + "/" + name if relative_dir else name
+                    is_dir = item["attributes"].get("dir", False)
+                    size = item["attributes"].get("size")
+                    entries.append((relative_path, is_dir, size))
+                    if is_dir:
+                        pending.append(relative_path)
+                offset += len(items)
+                if not items or offset >= listing.get("count", offset):
+                    break
+        return entries
+
     def chmod(self, remote_path, permissions):
         """Chmod operation on file or directory in datasets.
 
@@ -217,6 +739,7 @@ class DatasetApi:
         block=False,
         timeout=120,
         action="unzip",
+        target_path=None,
     ):
         """Internal (de)compression logic.
 
@@ -230,6 +753,9 @@ class DatasetApi:
         :type timeout: int
         :param action: zip or unzip
         :type action: str
+        :param target_path: path produced by the operation to wait for, defaults to
+            the zip file or the unzipped directory
+        :type target_path: str
         """
 
         _client = client.get_instance()
@@ -247,48 +773,41 @@ class DatasetApi:
             "POST", path_params, headers=headers, query_params=query_params
         )
 
+        if block is True and target_path is None:
+            if action == "zip":
+                zip_path = remote_path + ".zip"
+                if destination_path is None:
+                    target_path = zip_path
+                else:
+                    target_path = destination_path + "/" + os.path.split(zip_path)[1]
+            else:
+                target_path = remote_path[:-4]
+
         if block is True:
-            # Wait for zip file to appear. When it does, check that parent dir zipState is not set to CHOWNING
-            count = 0
-            while count < timeout:
-                if action == "zip":
-                    zip_path = remote_path + ".zip"
-                    # Get the status of the zipped file
-                    if destination_path is None:
-                        zip_exists = self.path_exists(zip_path)
-                    else:
-                        zip_exists = self.path_exists(
-                            destination_path + "/" + os.path.split(zip_path)[1]
-                        )
-                    # Get the zipState of the directory being zipped
-                    dir_status = self.get(remote_path)
-                    zip_state = (
-                        dir_status["zipState"] if "zipState" in dir_status else None
+            # Wait for the zip file or unzipped directory to appear. When it does,
+            # check that the zipState of the source is not set to CHOWNING anymore.
+            # Every iteration makes a single request.
+            target_exists = False
+
+            def check():
+                nonlocal target_exists
+                if not target_exists:
+                    target_exists = self.path_exists(target_path)
+                    return None
+                dir_status = self.get(remote_path)
+                zip_state = dir_status["zipState"] if "zipState" in dir_status else None
+                return True if zip_state == "NONE" else None
+
+            archive_poller = poller.Poller(timeout)
+            progress = self._get_progress(action, remote_path)
+            if archive_poller.poll(check, progress=progress) is None:
+                raise Exception(
+                    "Timeout of {} seconds exceeded while {} {}, after {} status requests.".format(
+                        timeout, action, remote_path, archive_poller.requests
                     )
-                    if zip_exists and zip_state == "NONE":
-                        return
-                    else:
-                        time.sleep(1)
-                elif action == "unzip":
-                    # Get the status of the unzipped dir
-                    unzipped_dir_exists = self.path_exists(remote_path[:-4])
-                    # Get the zipState of the zip being extracted
-                    dir_status = self.get(remote_path)
-                    zip_state = (
-                        dir_status["zipState"] if "zipState" in dir_status else None
-                    )
-                    if unzipped_dir_exists and zip_state == "NONE":
-                        return
-                    else:
-                        time.sleep(1)
-                count += 1
-            raise Exception(
-                "Timeout of {} seconds exceeded while {} {}.".format(
-                    timeout, action, remote_path
                 )
-            )
 
-    def unzip(self, remote_path, block=False, timeout=120):
+    def unzip(self, remote_path, block=False, timeout=120, target_path=None):
         """Unzip an archive in the dataset.
 
         :param remote_path: path to file or directory to unzip
@@ -297,8 +816,17 @@ class DatasetApi:
         :type block: bool
         :param timeout: timeout if the operation is blocking
         :type timeout: int
+        :param target_path: path extracted from the archive to wait for, defaults to
+            the unzipped directory, which must not exist before
+        :type target_path: str
         """
-        self._archive(remote_path, block=block, timeout=timeout, action="unzip")
+        self._archive(
+            remote_path,
+            block=block,
+            timeout=timeout,
+            action="unzip",
+            target_path=target_path,
+        )
 
     def zip(self, remote_path, destination_path=None, block=False, timeout=120):
         """Zip a file or directory in the dataset.
@@ -342,6 +870,25 @@ class DatasetApi:
             "POST", path_params, headers=headers, query_params=query_params
         )
 
+    def copy(self, source_path, destination_path):
+        """Copy a file or directory in the dataset.
+
+        :param source_path: path to file or directory to copy
+        :type source_path: str
+        :param destination_path: destination path
+        :type destination_path: str
+        """
+
+        _client = client.get_instance()
+        path_params = ["project", _client._project_id, "dataset", source_path]
+
+        query_params = {"action": "copy", "destination_path": destination_path}
+        headers = {"content-type": "application/json"}
+
+        _client._send_request(
+            "POST", path_params, headers=headers, query_params=query_params
+        )
+
     def add(self, path, name, value):
         """Attach a name/value tag to a training dataset or feature group.
 
@@ -0,0 +1,232 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+from hsml.core.retry_budget import RetryBudget
+from hsml.core.transfer_progress import TransferProgress
+
+
+class FlowUploadStream:
+    """Write-only file-like object uploading its content as the chunks of a flow upload.
+
+    Written bytes are cut into chunks of the flow chunk size, and every full chunk is
+    sent while the writer produces the next one. At most `max_concurrency` chunks are
+    in flight, which bounds the memory held by the stream. The total size of a flow
+    upload is part of its parameters, so it has to be known when the stream is opened.
+    """
+
+    def __init__(
+        self,
+        dataset_api,
+        upload_path,
+        base_params,
+        max_concurrency,
+        journal=None,
+        tuner=None,
+        retry_budget=None,
+        progress=None,
+    ):
+        self._dataset_api = dataset_api
+        self._upload_path = upload_path
+        self._base_params = base_params
+        self._file_name = base_params["flowFilename"]
+        self._size = base_params["flowTotalSize"]
+        self._chunk_size = base_params["flowChunkSize"]
+        self._max_concurrency = max(max_concurrency, 1)
+        self._journal = journal
+        self._tuner = tuner
+        self._retry_budget = (
+            retry_budget if retry_budget is not None else RetryBudget(0)
+        )
+        self._progress = (
+            progress if progress is not None else TransferProgress(None, None, None, 0)
+        )
+
+        self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency)
+        self._in_flight = set()
+        self._buffer = bytearray()
+        self._chunk_number = 1
+        self._written = 0
+        self._closed = False
+
+    def write(self, data):
+        if self._closed:
+            raise ValueError("write to closed upload stream")
+
+        self._written += len(data)
+        if self._written > self._size:
+            raise ValueError(
+                "Upload of {} exceeds its declared size of {} bytes".format(
+                    self._file_name, self._size
+                )
+            )
+
+        # Whole chunks, and the last chunk, are sent without going through the buffer
+        if not self._buffer and (
+            len(data) == self._chunk_size
+            or (self._written == self._size and len(data) <= self._chunk_size)
+        ):
+            self._submit(_immutable(data))
+            return len(data)
+
+        self._buffer += data
+        while len(self._buffer) >= self._chunk_size:
+            chunk = self._buffer[: self._chunk_size]
+            del self._buffer[: self._chunk_size]
+            self._submit(chunk)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _submit(self, chunk):
+        query_params = dict(self._base_params)
+        query_params["flowCurrentChunkSize"] = len(chunk)
+        query_params["flowChunkNumber"] = self._chunk_number
+        self._chunk_number += 1
+
+        self._in_flight.add(
+            self._executor.submit(
+                self._dataset_api._upload_chunk,
+                query_params,
+                self._upload_path,
+                self._file_name,
+                chunk,
+                self._journal,
+                self._tuner,
+                self._retry_budget,
+                self._progress,
+            )
+        )
+
+        # Bound the chunks held in memory to the ones currently in flight
+        if len(self._in_flight) >= self._max_concurrency:
+            self._wait(FIRST_COMPLETED)
+
+    def _wait(self, return_when):
+        """Wait for in-flight chunk uploads and raise the first failure."""
+        done, self._in_flight = wait(self._in_flight, return_when=return_when)
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
+
+    def close(self):
+        """Send the last chunk and wait for all chunks to be acknowledged."""
+        if self._closed:
+            return
+        try:
+            # an empty file is still sent as a single empty chunk
+            if self._buffer or self._chunk_number == 1:
+                chunk = self._buffer
+                self._buffer = bytearray()
+                self._submit(chunk)
+            self._wait(ALL_COMPLETED)
+            if self._written != self._size:
+                raise ValueError(
+                    "Upload of {} ended after {} bytes, expected {} bytes".format(
+                        self._file_name, self._written, self._size
+                    )
+                )
+        except BaseException:
+            self.abort()
+            raise
+        self._executor.shutdown()
+        self._closed = True
+
+        if self._journal is not None:
+            self._journal.remove()
+
+        self._progress.done()
+
+        if self._tuner is not None:
+            self._tuner.tune()
+
+    def abort(self):
+        """Stop the upload, cancelling the chunks which were not sent yet."""
+        for future in self._in_flight:
+            future.cancel()
+        self._executor.shutdown()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def chunk_size(self):
+        """Flow chunk size of the upload."""
+        return self._chunk_size
+
+
+def _immutable(data):
+    """Chunk data the writer can not change while it is in flight.
+
+    Bytes and read-only memoryviews, such as views over a mapped file, are not copied.
+    Buffers the writer may reuse, such as a `bytearray`, are copied.
+    """
+    if isinstance(data, bytes) or (isinstance(data, memoryview) and data.readonly):
+        return data
+    return bytes(data)
+
+
+class MultipartChunkBody:
+    """Multipart form body of a flow chunk request.
+
+    The form fields and the headers of the file part are encoded up front, while the
+    chunk itself is handed to the connection as it is, so a memoryview chunk is sent
+    without being copied into the request body. The body has a length, so it is sent
+    with a `Content-Length` header rather than chunked transfer encoding.
+    """
+
+    def __init__(self, params, file_name, chunk):
+        self._boundary = uuid.uuid4().hex
+        head = []
+        for name, value in params.items():
+            head.append(
+                "--{}\r\n"
+                'Content-Disposition: form-data; name="{}"\r\n\r\n'
+                "{}\r\n".format(self._boundary, name, value)
+            )
+        head.append(
+            "--{}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="{}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n".format(
+                self._boundary, file_name.replace('"', "%22")
+            )
+        )
+        self._head = "".join(head).encode("utf-8")
+        self._chunk = chunk
+        self._tail = "\r\n--{}--\r\n".format(self._boundary).encode("utf-8")
+
+    def __iter__(self):
+        yield self._head
+        yield self._chunk
+        yield self._tail
+
+    def __len__(self):
+        return len(self._head) + len(self._chunk) + len(self._tail)
+
+    @property
+    def content_type(self):
+        """Content type header value, including the boundary of the parts."""
+        return "multipart/form-data; boundary=" + self._boundary
@@ -0,0 +1,449 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ModelCache:
+    """Size-bounded local cache of downloaded model versions.
+
+    Model versions are immutable, so a version downloaded once can be served from
+    local disk afterwards. Entries are keyed by project, model name and version, and
+    laid out as `<cache_dir>/<project>/<name>/<version>`. Every entry has a metadata
+    file next to it holding its size and whether it is pinned. The modification time
+    of the metadata file is the last access time of the entry.
+
+    The cache can be shared by the processes of a host. A model version is downloaded
+    by the process holding the lock of its entry, into a staging directory which is
+    then renamed into place, while other processes wait for the lock and reuse the
+    entry. An entry is only a cache hit once its metadata is written, after the
+    rename, so a holder crashing midway leaves no entry behind, and the operating
+    system releases its lock.
+
+    A path returned by `get` or `fetch` stays valid until `release` is called for its
+    entry, or until the process exits. The process holds a shared lock on the entry
+    meanwhile, so that no process evicts it while its files are loaded.
+
+    When the cache grows beyond `max_size`, the least recently used entries are
+    evicted. Pinned entries, entries being downloaded and entries in use are never
+    evicted, so the cache may grow beyond `max_size` while they fill it. Windows has
+    no shared file locks, there entries accessed within the last
+    `IN_USE_GRACE_PERIOD` seconds are considered in use instead.
+    """
+
+    STAGING_DIR = ".staging"
+    METADATA_SUFFIX = ".entry.json"
+    LOCK_SUFFIX = ".lock"
+    READERS_SUFFIX = ".readers"
+    IN_USE_GRACE_PERIOD = 3600
+
+    def __init__(self, cache_dir, max_size):
+        self._cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self._max_size = max_size
+        os.makedirs(self._cache_dir, exist_ok=True)
+        # shared locks on the entries whose path was returned, by entry path
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+
+    def _entry_path(self, project, name, version):
+        return os.path.join(self._cache_dir, project, name, str(version))
+
+    def model_dir(self, project, name):
+        """Directory holding the cached versions of a model, as `<version>` directories.
+
+        :param project: name of the project of the model
+        :type project: str
+        :param name: name of the model
+        :type name: str
+        :return: path of the directory, which may not exist
+        :rtype: str
+        """
+        return os.path.join(self._cache_dir, project, name)
+
+    def _metadata_path(self, entry_path):
+        return entry_path + self.METADATA_SUFFIX
+
+    def _entry_lock(self, entry_path):
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        return _FileLock(entry_path + self.LOCK_SUFFIX)
+
+    def _read_metadata(self, entry_path):
+        try:
+            with open(self._metadata_path(entry_path), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_metadata(self, entry_path, metadata):
+        # written aside and renamed, so a metadata file is never partially written
+        metadata_path = self._metadata_path(entry_path)
+        temp_path = metadata_path + "." + uuid.uuid4().hex
+        with open(temp_path, "w") as f:
+            json.dump(metadata, f)
+        os.replace(temp_path, metadata_path)
+
+    def get(self, project, name, version):
+        """Local path of a cached model version, marking it as recently used.
+
+        The entry is not evicted until it is released, see `release`.
+
+        :param project: name of the project of the model
+        :type project: str
+        :param name: name of the model
+        :type name: str
+        :param version: version of the model
+        :type version: int
+        :return: path of the cached model version, or `None` if it is not cached
+        :rtype: str
+        """
+        entry_path = self._entry_path(project, name, version)
+        # an entry without metadata was not completely added
+        if self._read_metadata(entry_path) is None or not os.path.isdir(entry_path):
+            return None
+        if not self._hold(entry_path):
+            # evicted in the meantime
+            return None
+        return entry_path
+
+    def _hold(self, entry_path):
+        """Hold the shared lock of an entry, if it is still cached.
+
+        The lock is taken before the entry is checked, an entry seen cached then
+        can not be evicted anymore.
+
+        :return: boolean whether the entry is cached and held
+        :rtype: bool
+        """
+        with self._readers_lock:
+            lock = self._readers.pop(entry_path, None)
+            if lock is None and fcntl is not None:
+                lock = _FileLock(entry_path + self.READERS_SUFFIX, shared=True)
+                lock.acquire()
+            try:
+                if self._read_metadata(entry_path) is None:
+                    raise OSError()
+                os.utime(self._metadata_path(entry_path))
+            except OSError:
+                if lock is not None:
+                    lock.release()
+                return False
+            self._readers[entry_path] = lock
+            return True
+
+    def release(self, project, name, version):
+        """Release a model version whose path was returned, so that it can be evicted.
+
+        Its path must not be used anymore afterwards.
+
+        :param project: name of the project of the model
+        :type project: str
+        :param name: name of the model
+        :type name: str
+        :param version: version of the model
+        :type version: int
+        """
+        self._release(self._entry_path(project, name, version))
+        self._evict()
+
+    def _release(self, entry_path):
+        with self._readers_lock:
+            lock = self._readers.pop(entry_path, None)
+            if lock is not None:
+                lock.release()
+
+    def fetch(self, project, name, version, download):
+        """Local path of a model version, downloading it into the cache on a miss.
+
+        Only one thread or process downloads a given model version at a time, the
+        others wait for it and return the cached entry. The entry is not evicted until
+        it is released, see `release`.
+
+        :param project: name of the project of the model
+        :type project: str
+        :param name: name of the model
+        :type name: str
+        :param version: version of the model
+        :type version: int
+        :param download: function downloading the model version into the staging
+            directory it is given, returning the local path of the model version
+        :type download: callable
+        :return: path of the cached model version
+        :rtype: str
+        """
+        cached_path = self.get(project, name, version)
+        if cached_path is not None:
+            return cached_path
+
+        entry_path = self._entry_path(project, name, version)
+        lock = self._entry_lock(entry_path)
+        if not lock.acquire(blocking=False):
+            print(
+                "Waiting for model {} version {} to be downloaded by another "
+                "process".format(name, version)
+            )
+            lock.acquire()
+        try:
+            cached_path = self.get(project, name, version)
+            if cached_path is not None:
+                return cached_path
+
+            # leftovers of a holder which crashed are discarded
+            staging_dir = os.path.join(
+                self._cache_dir, self.STAGING_DIR, project, name, str(version)
+            )
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            os.makedirs(staging_dir)
+            try:
+                self._publish(entry_path, download(staging_dir))
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            # held before the entry lock is released, so it is never evictable
+            self._hold(entry_path)
+        finally:
+            lock.release()
+
+        self._evict(keep=entry_path)
+        return entry_path
+
+    def _publish(self, entry_path, local_path):
+        """Rename a downloaded model version into place, the entry lock being held."""
+        size = _directory_size(local_path)
+        if os.path.exists(self._metadata_path(entry_path)):
+            os.remove(self._metadata_path(entry_path))
+        shutil.rmtree(entry_path, ignore_errors=True)
+        os.rename(local_path, entry_path)
+        self._write_metadata(entry_path, {"size": size, "pinned": False})
+
+    def pin(self, project, name, version):
+        """Pin a cached model version, so that it is never evicted.
+
+        :param project: name of the project of the model
+        :type project: str
+        :param name: name of the model
+        :type name: str
+        :param version: version of the model
+        :type version: int
+        :return: boolean whether the model version is cached and now pinned
+        :rtype: bool
+        """
+        return self._set_pinned(project, name, version, True)
+
+    def unpin(self, project, name, version):
+        """Unpin a cached model version, so that it can be evicted again.
+
+        :param project: name of the project of the model
+        :type project: str
+        :param name: name of the model
+        :type name: str
+        :param version: version of the model
+        :type version: int
+        :return: boolean whether the model version is cached
+        :rtype: bool
+        """
+        cached = self._set_pinned(project, name, version, False)
+        if cached:
+            self._evict()
+        return cached
+
+    def _set_pinned(self, project, name, version, pinned):
+        entry_path = self._entry_path(project, name, version)
+        with self._entry_lock(entry_path):
+            metadata = self._read_metadata(entry_path)
+            if metadata is None:
+                return False
+            metadata["pinned"] = pinned
+            self._write_metadata(entry_path, metadata)
+        return True
+
+    def remove(self, project, name, version):
+        """Remove a model version from the cache, even if it is pinned or in use.
+
+        Paths of the model version returned by this cache must not be used anymore.
+
+        :param project: name of the project of the model
+        :type project: str
+        :param name: name of the model
+        :type name: str
+        :param version: version of the model
+        :type version: int
+        """
+        entry_path = self._entry_path(project, name, version)
+        self._release(entry_path)
+        with self._entry_lock(entry_path):
+            self._remove_entry(entry_path)
+
+    def _remove_entry(self, entry_path):
+        # the metadata goes first, so a partially removed entry is not a cache hit
+        metadata_path = self._metadata_path(entry_path)
+        if os.path.exists(metadata_path):
+            os.remove(metadata_path)
+        shutil.rmtree(entry_path, ignore_errors=True)
+
+    def _entries(self):
+        """Metadata of every entry, with its path and last access time."""
+        entries = []
+        for model_dir in glob.glob(os.path.join(self._cache_dir, "*", "*", "")):
+            # the staging directory starts with a dot, so it is not matched
+            for file_name in os.listdir(model_dir):
+                if not file_name.endswith(self.METADATA_SUFFIX):
+                    continue
+                entry_path = os.path.join(
+                    model_dir, file_name[: -len(self.METADATA_SUFFIX)]
+                )
+                metadata = self._read_metadata(entry_path)
+                if metadata is None:
+                    continue
+                try:
+                    metadata["last_access"] = os.path.getmtime(
+                        self._metadata_path(entry_path)
+                    )
+                except OSError:
+                    continue
+                metadata["path"] = entry_path
+                entries.append(metadata)
+        return entries
+
+    def _evict(self, keep=None):
+        """Evict least recently used entries until the cache fits its maximum size.
+
+        Evictions of concurrent processes are serialized by a lock of the whole cache.
+        Entries being downloaded, in use or pinned are skipped.
+        """
+        with _FileLock(os.path.join(self._cache_dir, self.LOCK_SUFFIX)):
+            entries = self._entries()
+            total_size = sum(entry["size"] for entry in entries)
+            for entry in sorted(entries, key=lambda entry: entry["last_access"]):
+                if total_size <= self._max_size:
+                    break
+                if entry["pinned"] or entry["path"] == keep:
+                    continue
+                if fcntl is None and (
+                    time.time() - entry["last_access"] < self.IN_USE_GRACE_PERIOD
+                ):
+                    continue
+                lock = _FileLock(entry["path"] + self.LOCK_SUFFIX)
+                if not lock.acquire(blocking=False):
+                    continue
+                try:
+                    readers = _FileLock(entry["path"] + self.READERS_SUFFIX)
+                    if fcntl is not None and not readers.acquire(blocking=False):
+                        continue
+                    try:
+                        metadata = self._read_metadata(entry["path"])
+                        if metadata is None or metadata["pinned"]:
+                            continue
+                        self._remove_entry(entry["path"])
+                        total_size -= entry["size"]
+                    finally:
+                        if fcntl is not None:
+                            readers.release()
+                finally:
+                    lock.release()
+
+    @property
+    def size(self):
+        """Total size in bytes of the cached model versions."""
+        return sum(entry["size"] for entry in self._entries())
+
+    @property
+    def cache_dir(self):
+        """Directory of the cache."""
+        return self._cache_dir
+
+    @property
+    def max_size(self):
+        """Maximum size in bytes of the cache."""
+        return self._max_size
+
+
+class _FileLock:
+    """Lock on a file, shared by the threads and processes of a host.
+
+    A lock is exclusive, or `shared` with other shared locks, which is only supported
+    with `fcntl`. Every `_FileLock` opens the file on its own, so two of them conflict
+    even within a thread. The operating system releases the lock when the process
+    holding it dies.
+    """
+
+    def __init__(self, path, shared=False):
+        self._path = path
+        self._shared = shared
+        self._file = None
+
+    def acquire(self, blocking=True):
+        """Acquire the lock, waiting for it if `blocking`.
+
+        :return: boolean whether the lock was acquired
+        :rtype: bool
+        """
+        f = open(self._path, "a+")
+        while True:
+            try:
+                if fcntl is not None:
+                    flags = fcntl.LOCK_SH if self._shared else fcntl.LOCK_EX
+                    if not blocking:
+                        flags |= fcntl.LOCK_NB
+                    fcntl.flock(f.fileno(), flags)
+                else:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                self._file = f
+                return True
+            except OSError:
+                # msvcrt can not wait indefinitely for a lock, so it is polled
+                if blocking and fcntl is None:
+                    time.sleep(0.1)
+                    continue
+                f.close()
+                if blocking:
+                    raise
+                return False
+
+    def release(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def _directory_size(path):
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for file_name in filenames:
+            size += os.path.getsize(os.path.join(dirpath, file_name))
+    return size
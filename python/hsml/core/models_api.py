@@ -95,6 +95,26 @@ class ModelsApi:
         model_json = _client._send_request("GET", path_params, query_params)
         return model.Model.from_response_json(model_json)
 
+    def get_latest_version(self, name):
+        """Get the highest registered version of a model with a single request.
+
+        :param name: name of the model
+        :type name: str
+        :return: highest version of the model, `0` if it has no registered version
+        :rtype: int
+        """
+        _client = client.get_instance()
+        path_params = ["project", _client._project_id, "models"]
+        query_params = {
+            "filter_by": "name_eq:" + name,
+            "sort_by": "version:desc",
+            "limit": "1",
+        }
+        models_json = _client._send_request("GET", path_params, query_params)
+        if not models_json.get("items"):
+            return 0
+        return models_json["items"][0]["version"]
+
     def delete(self, model_instance):
         """Delete the model and metadata.
 
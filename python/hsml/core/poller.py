@@ -0,0 +1,80 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import random
+import time
+
+
+class Poller:
+    """Waits for a server-side operation by polling its status.
+
+    Every iteration sleeps, then makes a single status request. The sleep grows
+    exponentially from `base_delay` up to `max_delay`, with jitter so that concurrent
+    pollers spread their requests, until the status is ready or `timeout` seconds
+    passed. The number of status requests made is kept in `requests`.
+    """
+
+    DEFAULT_BASE_DELAY = 0.5
+    DEFAULT_MAX_DELAY = 10
+
+    def __init__(
+        self, timeout, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY
+    ):
+        self._timeout = timeout
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._requests = 0
+
+    def poll(self, check, progress=None):
+        """Call `check` until it returns a result other than `None`.
+
+        :param check: function making one status request, returning `None` while the
+            operation is not complete
+        :type check: callable
+        :param progress: progress to report the latency of every status request to,
+            done once the operation is complete
+        :type progress: TransferProgress
+        :return: result of `check`, or `None` if the timeout expired
+        """
+        deadline = time.monotonic() + self._timeout
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(self._delay(attempt), remaining))
+
+            start = time.perf_counter()
+            result = check()
+            self._requests += 1
+            if progress is not None:
+                progress.update(0, time.perf_counter() - start)
+            if result is not None:
+                if progress is not None:
+                    progress.done()
+                return result
+            attempt += 1
+
+    def _delay(self, attempt):
+        # equal jitter, half of the delay is kept so the backoff still grows
+        # the exponent is bounded, past it the delay is max_delay anyway
+        delay = min(self._max_delay, self._base_delay * 2 ** min(attempt, 32))
+        return random.uniform(delay / 2, delay)
+
+    @property
+    def requests(self):
+        """Number of status requests made so far."""
+        return self._requests
@@ -0,0 +1,163 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import time
+
+from hsml.core.retry_budget import RetryBudget
+from hsml.core.transfer_progress import TransferProgress
+
+
+class ResumableDownloadStream:
+    """Read-only file-like object over the content of a file in datasets.
+
+    The content is read sequentially from a streamed response. When the response
+    breaks or fails with a transient error, the file is requested again from the
+    current offset with a range request, as long as the retry budget lasts. A server
+    which can not resume sends the whole file again, and the bytes already read are
+    skipped.
+    """
+
+    def __init__(self, dataset_api, path, chunk_size, retry_budget, progress=None):
+        self._dataset_api = dataset_api
+        self._path = path
+        self._chunk_size = chunk_size
+        self._retry_budget = retry_budget
+        self._progress = (
+            progress if progress is not None else TransferProgress(None, None, None, 0)
+        )
+
+        self._response = None
+        self._chunks = None
+        self._buffer = memoryview(b"")
+        self._offset = 0
+        self._closed = False
+        self._done = False
+
+    def read(self, size=-1):
+        """Read up to `size` bytes, fewer only at the end of the file.
+
+        If `size` is negative, the rest of the file is read.
+        """
+        if self._closed:
+            raise ValueError("read from closed download stream")
+
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(self._chunk_size), b""))
+
+        parts = []
+        while size > 0:
+            if not self._buffer:
+                chunk = self._next_chunk()
+                if not chunk:
+                    break
+                self._buffer = memoryview(chunk)
+            part = self._buffer[:size]
+            self._buffer = self._buffer[size:]
+            self._offset += len(part)
+            size -= len(part)
+            parts.append(part)
+        return b"".join(parts)
+
+    def _next_chunk(self):
+        """Next chunk of the response body, resuming the download if it breaks."""
+        if self._done:
+            return b""
+        attempt = 0
+        while True:
+            try:
+                start = time.perf_counter()
+                if self._chunks is None:
+                    chunk = self._open()
+                    if not chunk:
+                        chunk = next(self._chunks, b"")
+                else:
+                    chunk = next(self._chunks, b"")
+                if chunk:
+                    self._progress.update(len(chunk), time.perf_counter() - start)
+                else:
+                    self._done = True
+                    self._progress.done()
+                return chunk
+            except RetryBudget.CAUGHT_EXCEPTIONS as e:
+                self._release()
+                self._retry_budget.backoff(e, attempt)
+                attempt += 1
+
+    def _open(self):
+        """Request the file from the current offset.
+
+        :return: bytes of the response past the offset already read, if the server
+            sent the whole file again
+        :rtype: bytes
+        """
+        if self._offset == 0:
+            self._response = self._dataset_api._download_request(self._path)
+        else:
+            self._response = self._dataset_api._download_request(
+                self._path, self._offset
+            )
+        self._chunks = self._response.iter_content(chunk_size=self._chunk_size)
+
+        content_range = self._dataset_api._get_content_range(self._response)
+        if self._progress.total is None:
+            if content_range is not None:
+                self._progress.total = content_range[2]
+            elif self._response.headers.get("Content-Length"):
+                self._progress.total = int(self._response.headers["Content-Length"])
+        if self._offset > 0 and content_range is None:
+            # the server can not resume, skip what was already read
+            skipped = 0
+            while skipped < self._offset:
+                chunk = next(self._chunks, b"")
+                if not chunk:
+                    raise IOError(
+                        "{} ended after {} bytes, {} bytes were read before".format(
+                            self._path, skipped, self._offset
+                        )
+                    )
+                skipped += len(chunk)
+            return chunk[len(chunk) - (skipped - self._offset) :]
+        if content_range is not None and content_range[0] != self._offset:
+            raise IOError(
+                "Requested {} from byte {}, but the server sent {}".format(
+                    self._path, self._offset, self._response.headers["Content-Range"]
+                )
+            )
+        return b""
+
+    def _release(self):
+        if self._response is not None:
+            self._response.close()
+        self._response = None
+        self._chunks = None
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self._release()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def offset(self):
+        """Number of bytes read so far."""
+        return self._offset
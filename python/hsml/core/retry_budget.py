@@ -0,0 +1,125 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from requests import exceptions as requests_exceptions
+
+from hsml.client.exceptions import RestAPIError
+
+
+class RetryBudget:
+    """Number of retries shared by all the requests of a transfer.
+
+    Failed requests are retried with exponential backoff and full jitter, waiting at
+    least as long as the `Retry-After` header of the response asks for. Only transient
+    failures are retried: connection errors, timeouts and the status codes in
+    `RETRYABLE_STATUS_CODES`. Once the budget is spent, the failure is raised.
+    """
+
+    RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+    RETRYABLE_EXCEPTIONS = (
+        requests_exceptions.ConnectionError,
+        requests_exceptions.Timeout,
+        requests_exceptions.ChunkedEncodingError,
+    )
+    CAUGHT_EXCEPTIONS = (RestAPIError,) + RETRYABLE_EXCEPTIONS
+    DEFAULT_BASE_DELAY = 1
+    DEFAULT_MAX_DELAY = 60
+
+    def __init__(
+        self, retries, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY
+    ):
+        self._remaining = retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, **kwargs):
+        """Call `fn`, retrying it on transient failures while the budget lasts."""
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except self.CAUGHT_EXCEPTIONS as e:
+                self.backoff(e, attempt)
+                attempt += 1
+
+    def backoff(self, error, attempt):
+        """Wait before retrying a failed request, or raise its error.
+
+        :param error: failure of the request
+        :type error: Exception
+        :param attempt: number of retries of the request so far
+        :type attempt: int
+        :raises Exception: `error`, if it is not transient or the budget is spent
+        """
+        if not self.is_retryable(error) or not self._consume():
+            raise error
+        delay = self._delay(attempt, error)
+        print(
+            "Request failed with {}, retrying in {:.1f} seconds.".format(
+                type(error).__name__, delay
+            )
+        )
+        time.sleep(delay)
+
+    def is_retryable(self, error):
+        """Whether a failed request is worth retrying."""
+        if isinstance(error, RestAPIError):
+            return error.response.status_code in self.RETRYABLE_STATUS_CODES
+        return isinstance(error, self.RETRYABLE_EXCEPTIONS)
+
+    def _consume(self):
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            return True
+
+    def _delay(self, attempt, error):
+        delay = random.uniform(0, min(self._max_delay, self._base_delay * 2**attempt))
+        if isinstance(error, RestAPIError):
+            retry_after = self._retry_after(error.response)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        return delay
+
+    def _retry_after(self, response):
+        """Seconds to wait according to the `Retry-After` header, if any."""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+    @property
+    def remaining(self):
+        """Number of retries left."""
+        return self._remaining
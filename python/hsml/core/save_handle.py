@@ -0,0 +1,142 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Executor running background saves, created on first use.
+
+    Its workers are not daemon threads, so the interpreter waits for running saves to
+    complete before exiting.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=SaveHandle.MAX_CONCURRENT_SAVES,
+                thread_name_prefix="hsml-save",
+            )
+        return _executor
+
+
+class SaveHandle:
+    """Handle of a model save running in the background.
+
+    The save goes through the phases `"pending"`, `"preparing"`, `"uploading"`,
+    `"registering"` and `"awaiting_registration"`, and ends as `"done"`, `"failed"` or
+    `"cancelled"`. It can be cancelled until the model is registered: a pending save
+    never starts, while a running save stops at its next phase and removes what it
+    uploaded.
+    """
+
+    PENDING = "pending"
+    PREPARING = "preparing"
+    UPLOADING = "uploading"
+    REGISTERING = "registering"
+    AWAITING_REGISTRATION = "awaiting_registration"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    CANCELLABLE_PHASES = [PENDING, PREPARING, UPLOADING]
+    MAX_CONCURRENT_SAVES = 4
+
+    def __init__(self):
+        self._phase = self.PENDING
+        self._cancel_requested = False
+        self._lock = threading.Lock()
+        self._future = None
+
+    def _start(self, save, *args, **kwargs):
+        self._future = _get_executor().submit(self._run, save, *args, **kwargs)
+
+    def _run(self, save, *args, **kwargs):
+        try:
+            result = save(*args, **kwargs)
+        except CancelledError:
+            self._phase = self.CANCELLED
+            raise
+        except BaseException:
+            self._phase = self.FAILED
+            raise
+        self._phase = self.DONE
+        return result
+
+    def _enter_phase(self, phase):
+        """Move the save to its next phase, raising if it was cancelled meanwhile.
+
+        :raises CancelledError: if the save was cancelled
+        """
+        with self._lock:
+            if self._cancel_requested:
+                raise CancelledError()
+            self._phase = phase
+
+    def cancel(self):
+        """Cancel the save, if the model is not registered yet.
+
+        # Returns
+            `bool`: Whether the save is cancelled. A running save stops at its next
+                phase, `result()` raises `CancelledError` once it stopped.
+        """
+        with self._lock:
+            if self._future.cancel():
+                self._phase = self.CANCELLED
+                return True
+            if self._phase in self.CANCELLABLE_PHASES:
+                self._cancel_requested = True
+                return True
+            return self._phase == self.CANCELLED
+
+    def result(self, timeout: float = None):
+        """Wait for the save to complete.
+
+        # Arguments
+            timeout: Seconds to wait, defaults to `None`, which waits indefinitely.
+        # Returns
+            `Model`: The registered model metadata object, `None` if it was not
+                available by the end of `await_registration`.
+        # Raises
+            `concurrent.futures.TimeoutError`: If the save did not complete in time.
+            `concurrent.futures.CancelledError`: If the save was cancelled.
+        """
+        return self._future.result(timeout)
+
+    def exception(self, timeout: float = None):
+        """Wait for the save to complete and return the error it failed with, if any.
+
+        # Arguments
+            timeout: Seconds to wait, defaults to `None`, which waits indefinitely.
+        # Returns
+            `Exception`: The error the save failed with, `None` if it succeeded.
+        """
+        return self._future.exception(timeout)
+
+    def done(self):
+        """Whether the save completed, failed or was cancelled."""
+        return self._future.done()
+
+    @property
+    def phase(self):
+        """Current phase of the save."""
+        return self._phase
+
+    def __repr__(self):
+        return "SaveHandle({!r})".format(self._phase)
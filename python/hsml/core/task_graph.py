@@ -0,0 +1,86 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class TaskGraph:
+    """Runs tasks concurrently, each as soon as the tasks it depends on completed.
+
+    Tasks are added with `add` and run together when `run` is called. A task is
+    called with the results of its dependencies, in the order they were given. When
+    a task fails, tasks which did not start yet are not started, and the failure is
+    raised once the running ones are done.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    def add(self, name, fn, depends_on=()):
+        """Add a task to the graph.
+
+        :param name: unique name of the task
+        :type name: str
+        :param fn: function running the task, called with the results of its
+            dependencies
+        :type fn: callable
+        :param depends_on: names of the tasks which have to complete first, added
+            before this one
+        :type depends_on: list
+        """
+        if name in self._tasks:
+            raise ValueError("Task {} is already in the graph".format(name))
+        for dependency in depends_on:
+            if dependency not in self._tasks:
+                raise ValueError(
+                    "Task {} depends on unknown task {}".format(name, dependency)
+                )
+        self._tasks[name] = (fn, list(depends_on))
+
+    def run(self):
+        """Run the tasks and wait for them to complete.
+
+        Dependencies are added before their dependents, so the graph has no cycles.
+
+        :return: result of every task, by name
+        :rtype: dict
+        """
+        results = {}
+        pending = dict(self._tasks)
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as executor:
+            while pending or running:
+                if error is None:
+                    for name, (fn, depends_on) in list(pending.items()):
+                        if all(dependency in results for dependency in depends_on):
+                            del pending[name]
+                            args = [results[dependency] for dependency in depends_on]
+                            running[executor.submit(fn, *args)] = name
+                elif not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        if error is None:
+                            error = future.exception()
+                    else:
+                        results[name] = future.result()
+        if error is not None:
+            raise error
+        return results
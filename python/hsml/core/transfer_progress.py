@@ -0,0 +1,213 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import threading
+import time
+
+
+class TransferEvent:
+    """Progress of an upload, a download or an archive operation.
+
+    Throughputs are in bytes per second and latencies in seconds. Archive operations
+    transfer no bytes, their latency is the one of the status requests polling them.
+    """
+
+    def __init__(
+        self,
+        kind,
+        path,
+        transferred,
+        total,
+        elapsed,
+        throughput,
+        average_throughput,
+        latency,
+        done,
+    ):
+        self._kind = kind
+        self._path = path
+        self._transferred = transferred
+        self._total = total
+        self._elapsed = elapsed
+        self._throughput = throughput
+        self._average_throughput = average_throughput
+        self._latency = latency
+        self._done = done
+
+    @property
+    def kind(self):
+        """Kind of transfer, `"upload"`, `"download"`, `"zip"` or `"unzip"`."""
+        return self._kind
+
+    @property
+    def path(self):
+        """Path in datasets of the transfer."""
+        return self._path
+
+    @property
+    def transferred(self):
+        """Number of bytes transferred so far."""
+        return self._transferred
+
+    @property
+    def total(self):
+        """Total number of bytes of the transfer, `None` if it is not known."""
+        return self._total
+
+    @property
+    def elapsed(self):
+        """Seconds since the transfer started."""
+        return self._elapsed
+
+    @property
+    def throughput(self):
+        """Throughput since the previous event."""
+        return self._throughput
+
+    @property
+    def average_throughput(self):
+        """Throughput since the transfer started."""
+        return self._average_throughput
+
+    @property
+    def latency(self):
+        """Mean latency of the chunks or requests since the previous event, if any."""
+        return self._latency
+
+    @property
+    def done(self):
+        """Whether the transfer completed, this being its last event."""
+        return self._done
+
+    def __repr__(self):
+        return "TransferEvent({!r}, {!r}, {!r}/{!r} bytes, done={!r})".format(
+            self._kind, self._path, self._transferred, self._total, self._done
+        )
+
+
+class TransferProgress:
+    """Thread-safe progress of a transfer, reported to a callback at a bounded rate.
+
+    Updates are accumulated and an event is emitted at most every `interval` seconds,
+    plus a final event when the transfer is done. Without a callback, updates are
+    dropped right away.
+    """
+
+    def __init__(self, kind, path, callback, interval, total=None):
+        self._kind = kind
+        self._path = path
+        self._callback = callback
+        self._interval = interval
+        self._total = total
+
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._transferred = 0
+        self._last_emit = self._start
+        self._last_transferred = 0
+        self._latency_sum = 0.0
+        self._latency_count = 0
+
+    def update(self, num_bytes, latency=None):
+        """Record transferred bytes, negative if bytes were discarded to start over.
+
+        :param num_bytes: number of bytes transferred
+        :type num_bytes: int
+        :param latency: seconds the chunk or request took, if measured
+        :type latency: float
+        """
+        if self._callback is None:
+            return
+        with self._lock:
+            self._transferred += num_bytes
+            if latency is not None:
+                self._latency_sum += latency
+                self._latency_count += 1
+            now = time.monotonic()
+            if now - self._last_emit < self._interval:
+                return
+            event = self._event(now, False)
+        self._callback(event)
+
+    def done(self):
+        """Emit the final event of the transfer."""
+        if self._callback is None:
+            return
+        with self._lock:
+            event = self._event(time.monotonic(), True)
+        self._callback(event)
+
+    def _event(self, now, done):
+        elapsed = now - self._start
+        since_last = now - self._last_emit
+        event = TransferEvent(
+            self._kind,
+            self._path,
+            self._transferred,
+            self._total,
+            elapsed,
+            (
+                (self._transferred - self._last_transferred) / since_last
+                if since_last > 0
+                else 0.0
+            ),
+            self._transferred / elapsed if elapsed > 0 else 0.0,
+            self._latency_sum / self._latency_count if self._latency_count else None,
+            done,
+        )
+        self._last_emit = now
+        self._last_transferred = self._transferred
+        self._latency_sum = 0.0
+        self._latency_count = 0
+        return event
+
+    @property
+    def total(self):
+        """Total number of bytes of the transfer, `None` if it is not known."""
+        return self._total
+
+    @total.setter
+    def total(self, total):
+        self._total = total
+
+
+def print_progress(event):
+    """Progress callback printing every event on a line."""
+    if event.transferred == 0 and event.total is None:
+        # archive operations have no bytes to report
+        print(
+            "{} {}: {:.0f} seconds elapsed{}".format(
+                event.kind.capitalize(),
+                event.path,
+                event.elapsed,
+                ", done" if event.done else "",
+            )
+        )
+        return
+    if event.total:
+        percentage = " ({}%)".format(round(event.transferred / event.total * 100, 3))
+    else:
+        percentage = ""
+    print(
+        "{} {}: {} bytes{}, {:.1f} MiB/s{}".format(
+            event.kind.capitalize(),
+            event.path,
+            event.transferred,
+            percentage,
+            event.average_throughput / 1048576,
+            ", done" if event.done else "",
+        )
+    )
@@ -0,0 +1,93 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import os
+import hashlib
+import threading
+import zlib
+
+
+class UploadJournal:
+    """Local journal of the flow chunks acknowledged by the server.
+
+    The journal is keyed by the upload path, the flow identifier and the chunk size,
+    and stores a checksum next to every acknowledged chunk number, so that a retried
+    upload only skips chunks whose local content did not change.
+    """
+
+    DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".hsml", "uploads")
+
+    def __init__(self, upload_path, flow_identifier, chunk_size, journal_dir=None):
+        if journal_dir is None:
+            journal_dir = self.DEFAULT_JOURNAL_DIR
+        os.makedirs(journal_dir, exist_ok=True)
+
+        key = hashlib.sha1(
+            "{}/{}:{}".format(upload_path, flow_identifier, chunk_size).encode("utf-8")
+        ).hexdigest()
+        self._path = os.path.join(journal_dir, key + ".journal")
+        self._lock = threading.Lock()
+        self._acknowledged = self._read()
+
+    def _read(self):
+        acknowledged = {}
+        if not os.path.exists(self._path):
+            return acknowledged
+        with open(self._path, "r") as f:
+            for line in f:
+                try:
+                    chunk_number, checksum = line.split()
+                    acknowledged[int(chunk_number)] = int(checksum)
+                except ValueError:
+                    # last line may be incomplete if the process was killed mid-write
+                    pass
+        return acknowledged
+
+    def is_acknowledged(self, chunk_number, chunk):
+        """Whether the chunk was acknowledged with the same content in a previous attempt.
+
+        :param chunk_number: flow chunk number
+        :type chunk_number: int
+        :param chunk: content of the chunk
+        :type chunk: bytes
+        :return: boolean whether the chunk was acknowledged
+        :rtype: bool
+        """
+        return self._acknowledged.get(chunk_number) == zlib.crc32(chunk)
+
+    def acknowledge(self, chunk_number, chunk):
+        """Record a chunk acknowledged by the server.
+
+        :param chunk_number: flow chunk number
+        :type chunk_number: int
+        :param chunk: content of the chunk
+        :type chunk: bytes
+        """
+        checksum = zlib.crc32(chunk)
+        with self._lock:
+            with open(self._path, "a") as f:
+                f.write("{} {}\n".format(chunk_number, checksum))
+            self._acknowledged[chunk_number] = checksum
+
+    def remove(self):
+        """Remove the journal once the upload is complete."""
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    @property
+    def acknowledged_chunks(self):
+        """Number of chunks recorded in the journal."""
+        return len(self._acknowledged)
@@ -0,0 +1,132 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+from hsml import client
+from hsml.core.dataset_api import DatasetApi
+
+
+class UploadManager:
+    """Transfers several files to datasets concurrently.
+
+    Transfers are queued with `upload`, `upload_stream` and `copy`, and run together
+    when `run` is called. The upload concurrency of the connection is split between the
+    transfers and the chunks of each file, so the requests in flight stay within it and
+    share the connection pool of the client.
+    """
+
+    def __init__(
+        self,
+        dataset_api,
+        max_concurrency=None,
+        retries=DatasetApi.DEFAULT_UPLOAD_RETRIES,
+    ):
+        self._dataset_api = dataset_api
+        self._max_concurrency = max_concurrency
+        self._retries = retries
+        self._transfers = []
+
+    def upload(self, local_path, upload_path, resumable=False):
+        """Queue the upload of a local file.
+
+        :param local_path: local path of the file to upload
+        :type local_path: str
+        :param upload_path: path in datasets to upload
+        :type upload_path: str
+        :param resumable: whether to journal acknowledged chunks and resume from them
+        :type resumable: bool
+        """
+
+        def transfer(chunk_concurrency):
+            self._dataset_api.upload(
+                local_path,
+                upload_path,
+                max_concurrency=chunk_concurrency,
+                resumable=resumable,
+                retries=self._retries,
+            )
+
+        self._transfers.append(transfer)
+
+    def upload_stream(self, upload_path, file_name, size, write, resumable=False):
+        """Queue the upload of a file produced while it is being uploaded.
+
+        :param upload_path: path in datasets to upload
+        :type upload_path: str
+        :param file_name: name of the uploaded file
+        :type file_name: str
+        :param size: total size in bytes of the uploaded file
+        :type size: int
+        :param write: function writing exactly `size` bytes to the stream it is given
+        :type write: callable
+        :param resumable: whether to journal acknowledged chunks and resume from them
+        :type resumable: bool
+        """
+
+        def transfer(chunk_concurrency):
+            with self._dataset_api.upload_stream(
+                upload_path,
+                file_name,
+                size,
+                max_concurrency=chunk_concurrency,
+                resumable=resumable,
+                retries=self._retries,
+            ) as stream:
+                write(stream)
+
+        self._transfers.append(transfer)
+
+    def copy(self, source_path, destination_path):
+        """Queue a copy of a file which is already in datasets.
+
+        :param source_path: path to the file to copy
+        :type source_path: str
+        :param destination_path: destination path
+        :type destination_path: str
+        """
+
+        def transfer(_):
+            self._dataset_api.copy(source_path, destination_path)
+
+        self._transfers.append(transfer)
+
+    def run(self):
+        """Run the queued transfers and wait for them to complete.
+
+        When a transfer fails, transfers which did not start yet are cancelled and the
+        failure is raised once the running ones are done.
+        """
+        transfers, self._transfers = self._transfers, []
+        if not transfers:
+            return
+
+        max_concurrency = self._max_concurrency
+        if max_concurrency is None:
+            max_concurrency = client.get_instance()._upload_concurrency
+        file_concurrency = max(min(max_concurrency, len(transfers)), 1)
+        chunk_concurrency = max(max_concurrency // file_concurrency, 1)
+
+        with ThreadPoolExecutor(max_workers=file_concurrency) as executor:
+            futures = [
+                executor.submit(transfer, chunk_concurrency) for transfer in transfers
+            ]
+            _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+        for future in futures:
+            if not future.cancelled() and future.exception() is not None:
+                raise future.exception()
@@ -14,15 +14,17 @@
 #   limitations under the License.
 #
 
-from hsml.core import native_hdfs_api
+from hsml.core import dataset_api, native_hdfs_api
 
 
 class Engine:
     def __init__(self):
+        self._dataset_api = dataset_api.DatasetApi()
         self._native_hdfs_api = native_hdfs_api.NativeHdfsApi()
 
     def save(self, dataset_model_version_path):
+        # created through datasets, which fails if the directory exists, unlike hdfs
+        self._dataset_api.mkdir(dataset_model_version_path)
         project_path = self._native_hdfs_api.project_path()
         model_version_dir_hdfs = project_path + "/" + dataset_model_version_path
-        self._native_hdfs_api.mkdir(model_version_dir_hdfs)
         self._native_hdfs_api.chmod(model_version_dir_hdfs, "ug+rwx")
@@ -15,22 +15,45 @@
 #
 
 import json
+import warnings
 import tempfile
 import uuid
-import time
 import importlib
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 
-from hsml.client.exceptions import RestAPIError
+from hsml.client.exceptions import RestAPIError, ModelRegistryException
 
 from hsml import client, util
 
-from hsml.core import models_api, dataset_api
+from hsml.core import (
+    models_api,
+    dataset_api,
+    upload_manager,
+    save_handle,
+    poller,
+    task_graph,
+)
 
 from hsml.engine import local_engine, hopsworks_engine
 
 
 class Engine:
+    UPLOAD_MODE_ARCHIVE = "archive"
+    UPLOAD_MODE_STREAM = "stream"
+    UPLOAD_MODE_FILES = "files"
+    UPLOAD_MODES = [UPLOAD_MODE_ARCHIVE, UPLOAD_MODE_STREAM, UPLOAD_MODE_FILES]
+    MANIFEST_FILE_NAME = ".hsml_manifest.json"
+    # files uploaded next to the model files of a version
+    ARTIFACT_FILE_NAMES = ["input_example.json", "signature.json", MANIFEST_FILE_NAME]
+    DOWNLOAD_MODE_ARCHIVE = "archive"
+    DOWNLOAD_MODE_STREAM = "stream"
+    DOWNLOAD_MODE_FILES = "files"
+    DOWNLOAD_MODES = [DOWNLOAD_MODE_ARCHIVE, DOWNLOAD_MODE_STREAM, DOWNLOAD_MODE_FILES]
+    REGISTRATION_POLL_BASE_DELAY = 1
+    REGISTRATION_POLL_MAX_DELAY = 15
+
     def __init__(self):
         self._models_api = models_api.ModelsApi()
         self._dataset_api = dataset_api.DatasetApi()
@@ -41,37 +64,63 @@ class Engine:
         else:
             self._engine = hopsworks_engine.Engine()
 
-    def save(self, model_instance, local_model_path, await_registration=480):
+    def save(
+        self,
+        model_instance,
+        local_model_path,
+        await_registration=480,
+        upload_mode=UPLOAD_MODE_ARCHIVE,
+        parent_version=None,
+        upload_retries=dataset_api.DatasetApi.DEFAULT_UPLOAD_RETRIES,
+        handle=None,
+        upload_concurrency=None,
+        reserved=False,
+        auto_version=None,
+    ):
+        """Upload and register a model version.
+
+        :param handle: handle of a background save, to report its phases to and to
+            stop at the next phase once it is cancelled
+        :type handle: SaveHandle
+        :param upload_concurrency: number of chunk requests to keep in flight, defaults
+            to the upload concurrency of the connection
+        :type upload_concurrency: int
+        :param reserved: whether the model directory exists and the version was
+            assigned by `reserve_versions`
+        :type reserved: bool
+        :param auto_version: whether the version may move on to the next free one if
+            its directory exists, defaults to whether the model has no version
+        :type auto_version: bool
+        """
+        self._enter_phase(handle, save_handle.SaveHandle.PREPARING)
+
+        if upload_mode not in self.UPLOAD_MODES:
+            raise ValueError(
+                "Upload mode {} is not supported, use one of {}".format(
+                    upload_mode, self.UPLOAD_MODES
+                )
+            )
 
         if model_instance._training_metrics is not None:
             util.validate_metrics(model_instance._training_metrics)
 
-        dataset_models_root_path = "Models"
+        dataset_model_path = "Models/" + model_instance._name
 
-        if not self._dataset_api.path_exists(dataset_models_root_path):
-            raise AssertionError(
-                "Models dataset does not exist in this project. Please enable the Serving service or create it manually."
-            )
+        if auto_version is None:
+            auto_version = model_instance._version is None
 
-        dataset_model_path = dataset_models_root_path + "/" + model_instance._name
+        if not reserved:
+            self._check_models_dataset()
 
-        if not self._dataset_api.path_exists(dataset_model_path):
-            self._dataset_api.mkdir(dataset_model_path)
+            if not self._dataset_api.path_exists(dataset_model_path):
+                self._dataset_api.mkdir(dataset_model_path)
 
-        # Set model version if not defined
-        if model_instance._version is None:
-            current_highest_version = 0
-            for item in self._dataset_api.list(dataset_model_path, sort_by="NAME:desc")[
-                "items"
-            ]:
-                _, file_name = os.path.split(item["attributes"]["path"])
-                try:
-                    current_version = int(file_name)
-                    if current_version > current_highest_version:
-                        current_highest_version = current_version
-                except RestAPIError:
-                    pass
-            model_instance._version = current_highest_version + 1
+            # Set model version if not defined
+            if model_instance._version is None:
+                model_instance._version = self._next_version(model_instance._name)
+
+        # create folders
+        dataset_model_version_path = self._claim_version(model_instance, auto_version)
 
         print(
             "Exporting model {} with version {}".format(
@@ -79,20 +128,8 @@ class Engine:
             )
         )
 
-        dataset_model_version_path = (
-            "Models/" + model_instance._name + "/" + str(model_instance._version)
-        )
-
-        if self._dataset_api.path_exists(dataset_model_version_path):
-            raise RestAPIError(
-                "Model with name {} and version {} already exists".format(
-                    model_instance._name, model_instance._version
-                )
-            )
-
         try:
-            # create folders
-            self._engine.save(dataset_model_version_path)
+            self._enter_phase(handle, save_handle.SaveHandle.UPLOADING)
 
             model_query_params = {}
 
@@ -107,131 +144,679 @@ class Engine:
             _client = client.get_instance()
             model_instance._project_name = _client._project_name
 
-            if model_instance.input_example is not None:
-                input_example_path = os.getcwd() + "/input_example.json"
-                input_example = util.input_example_to_json(model_instance.input_example)
+            with tempfile.TemporaryDirectory(dir=os.getcwd()) as artifacts_dir:
+                self._save_graph(
+                    model_instance,
+                    local_model_path,
+                    dataset_model_version_path,
+                    artifacts_dir,
+                    model_query_params,
+                    upload_mode,
+                    parent_version,
+                    upload_retries,
+                    upload_concurrency,
+                    handle,
+                ).run()
 
-                with open(input_example_path, "w+") as out:
-                    json.dump(input_example, out, cls=util.NumpyEncoder)
+            if await_registration > 0:
+                self._enter_phase(handle, save_handle.SaveHandle.AWAITING_REGISTRATION)
+                print(
+                    "Polling "
+                    + model_instance.name
+                    + " version "
+                    + str(model_instance.version)
+                    + " for model availability."
+                )
+
+                def check():
+                    try:
+                        return self._models_api.get(
+                            name=model_instance.name, version=model_instance.version
+                        )
+                    except RestAPIError:
+                        return None
 
-                self._dataset_api.upload(input_example_path, dataset_model_version_path)
-                os.remove(input_example_path)
-                model_instance.input_example = (
-                    dataset_model_version_path + "/input_example.json"
+                registration_poller = poller.Poller(
+                    await_registration,
+                    base_delay=self.REGISTRATION_POLL_BASE_DELAY,
+                    max_delay=self.REGISTRATION_POLL_MAX_DELAY,
                 )
+                model = registration_poller.poll(check)
+                if model is not None:
+                    print(
+                        "Model is now registered, after {} status requests.".format(
+                            registration_poller.requests
+                        )
+                    )
+                    return model
+                print(
+                    "Model not available during polling, set a higher value for await_registration to wait longer."
+                )
+        except BaseException as be:
+            archive_path = self._archive_path(dataset_model_version_path)
+            if self._dataset_api.path_exists(archive_path):
+                self._dataset_api.rm(archive_path)
+            if self._dataset_api.path_exists(dataset_model_version_path):
+                self._dataset_api.rm(dataset_model_version_path)
+            raise be
+
+    def _save_graph(
+        self,
+        model_instance,
+        local_model_path,
+        dataset_model_version_path,
+        artifacts_dir,
+        model_query_params,
+        upload_mode,
+        parent_version,
+        upload_retries,
+        upload_concurrency,
+        handle,
+    ):
+        """Steps of a model save, as a graph of the steps they depend on.
+
+        The lineage, the input example, the signature, the manifest and the archive of
+        the model are prepared concurrently, and each upload starts as soon as what it
+        uploads is ready. An uploaded archive is extracted once every file is uploaded,
+        and the model is registered last, once its version directory is complete.
+        """
+        graph = task_graph.TaskGraph()
+
+        graph.add("lineage", lambda: self._set_lineage(model_instance))
+        graph.add(
+            "input_example",
+            lambda: self._write_input_example(
+                model_instance, artifacts_dir, dataset_model_version_path
+            ),
+        )
+        graph.add(
+            "signature",
+            lambda: self._write_signature(
+                model_instance, artifacts_dir, dataset_model_version_path
+            ),
+        )
+        graph.add(
+            "manifest", lambda: self._write_manifest(local_model_path, artifacts_dir)
+        )
+
+        def upload_artifacts(*paths):
+            # artifacts are small, a request at a time leaves the concurrency to the
+            # model files
+            uploads = upload_manager.UploadManager(
+                self._dataset_api, max_concurrency=1, retries=upload_retries
+            )
+            for path in paths:
+                if path is not None:
+                    uploads.upload(path, dataset_model_version_path)
+            uploads.run()
+
+        graph.add(
+            "upload_artifacts",
+            upload_artifacts,
+            depends_on=["input_example", "signature", "manifest"],
+        )
+
+        uploads = upload_manager.UploadManager(
+            self._dataset_api,
+            max_concurrency=upload_concurrency,
+            retries=upload_retries,
+        )
+
+        if parent_version is not None:
+            graph.add(
+                "parent_manifest",
+                lambda: self._read_parent_manifest(
+                    model_instance._name, parent_version
+                ),
+            )
+
+            def upload_model(manifest_path, parent_manifest):
+                if parent_manifest is None:
+                    archive_path = self._add_model(
+                        uploads,
+                        local_model_path,
+                        dataset_model_version_path,
+                        artifacts_dir,
+                        upload_mode,
+                    )
+                else:
+                    archive_path = None
+                    self._add_changed_model_files(
+                        uploads,
+                        local_model_path,
+                        dataset_model_version_path,
+                        manifest_path,
+                        parent_manifest,
+                        parent_version,
+                    )
+                uploads.run()
+                return archive_path
+
+            graph.add(
+                "upload_model",
+                upload_model,
+                depends_on=["manifest", "parent_manifest"],
+            )
+        elif upload_mode == self.UPLOAD_MODE_ARCHIVE:
+            graph.add(
+                "archive",
+                lambda: self._add_archive(
+                    uploads,
+                    local_model_path,
+                    dataset_model_version_path,
+                    artifacts_dir,
+                ),
+            )
 
-            if model_instance.signature is not None:
-                signature_path = os.getcwd() + "/signature.json"
-                signature = model_instance.signature
+            def upload_archive(archive_path):
+                uploads.run()
+                return archive_path
 
-                with open(signature_path, "w+") as out:
-                    out.write(signature.json())
+            graph.add("upload_model", upload_archive, depends_on=["archive"])
+        else:
 
-                self._dataset_api.upload(signature_path, dataset_model_version_path)
-                os.remove(signature_path)
-                model_instance.signature = (
-                    dataset_model_version_path + "/signature.json"
+            def upload_model():
+                archive_path = self._add_model(
+                    uploads,
+                    local_model_path,
+                    dataset_model_version_path,
+                    artifacts_dir,
+                    upload_mode,
                 )
+                uploads.run()
+                return archive_path
 
-            if model_instance.training_dataset is not None:
-                td_location_split = model_instance.training_dataset.location.split("/")
-                for i in range(len(td_location_split)):
-                    if td_location_split[i] == "Projects":
-                        model_instance._training_dataset = (
-                            td_location_split[i + 1]
-                            + ":"
-                            + model_instance.training_dataset.name
-                            + ":"
-                            + str(model_instance.training_dataset.version)
-                        )
+            graph.add("upload_model", upload_model)
+
+        def extract(archive_path, _):
+            if archive_path is not None:
+                self._extract_archive(
+                    dataset_model_version_path, archive_path, local_model_path
+                )
 
+        graph.add("extract", extract, depends_on=["upload_model", "upload_artifacts"])
+
+        def register(*_):
+            self._enter_phase(handle, save_handle.SaveHandle.REGISTERING)
             self._models_api.put(model_instance, model_query_params)
 
-            zip_out_dir = None
+        graph.add(
+            "register",
+            register,
+            depends_on=["lineage", "extract"],
+        )
+        return graph
+
+    def _set_lineage(self, model_instance):
+        if model_instance.training_dataset is not None:
+            td_location_split = model_instance.training_dataset.location.split("/")
+            for i in range(len(td_location_split)):
+                if td_location_split[i] == "Projects":
+                    model_instance._training_dataset = (
+                        td_location_split[i + 1]
+                        + ":"
+                        + model_instance.training_dataset.name
+                        + ":"
+                        + str(model_instance.training_dataset.version)
+                    )
+
+    def _write_input_example(
+        self, model_instance, artifacts_dir, dataset_model_version_path
+    ):
+        """Write the input example to upload, `None` if the model has none."""
+        if model_instance.input_example is None:
+            return None
+        input_example_path = os.path.join(artifacts_dir, "input_example.json")
+        input_example = util.input_example_to_json(model_instance.input_example)
+
+        with open(input_example_path, "w+") as out:
+            json.dump(input_example, out, cls=util.NumpyEncoder)
+
+        model_instance.input_example = (
+            dataset_model_version_path + "/input_example.json"
+        )
+        return input_example_path
+
+    def _write_signature(
+        self, model_instance, artifacts_dir, dataset_model_version_path
+    ):
+        """Write the signature to upload, `None` if the model has none."""
+        if model_instance.signature is None:
+            return None
+        signature_path = os.path.join(artifacts_dir, "signature.json")
+        signature = model_instance.signature
+
+        with open(signature_path, "w+") as out:
+            out.write(signature.json())
+
+        model_instance.signature = dataset_model_version_path + "/signature.json"
+        return signature_path
+
+    def _write_manifest(self, local_model_path, artifacts_dir):
+        """Write the manifest of the model files to upload."""
+        manifest = util.model_manifest(local_model_path)
+        manifest_path = os.path.join(artifacts_dir, self.MANIFEST_FILE_NAME)
+        with open(manifest_path, "w+") as out:
+            json.dump(manifest, out)
+        return manifest_path
+
+    def _read_parent_manifest(self, name, parent_version):
+        parent_manifest = self._read_manifest(name, parent_version)
+        if parent_manifest is None:
+            warnings.warn(
+                "Model {} version {} has no manifest, all files will be uploaded.".format(
+                    name, parent_version
+                )
+            )
+        return parent_manifest
+
+    def _add_model(
+        self,
+        uploads,
+        local_model_path,
+        dataset_model_version_path,
+        artifacts_dir,
+        upload_mode,
+    ):
+        """Queue the upload of the model files as the upload mode requires.
+
+        :return: path of the uploaded archive to extract, if any
+        :rtype: str
+        """
+        if upload_mode == self.UPLOAD_MODE_FILES:
+            self._add_model_files(uploads, local_model_path, dataset_model_version_path)
+            return None
+        if upload_mode == self.UPLOAD_MODE_STREAM:
+            return self._add_archive_stream(
+                uploads, local_model_path, dataset_model_version_path
+            )
+        return self._add_archive(
+            uploads, local_model_path, dataset_model_version_path, artifacts_dir
+        )
+
+    def _add_changed_model_files(
+        self,
+        uploads,
+        local_model_path,
+        dataset_model_version_path,
+        manifest_path,
+        parent_manifest,
+        parent_version,
+    ):
+        """Queue the upload of the model files which changed since the parent version."""
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        unchanged_files = [
+            relative_path
+            for relative_path, entry in manifest["files"].items()
+            if parent_manifest["files"].get(relative_path) == entry
+        ]
+        print(
+            "Copying {} unchanged files from version {}, uploading {} files.".format(
+                len(unchanged_files),
+                parent_version,
+                len(manifest["files"]) - len(unchanged_files),
+            )
+        )
+        self._add_model_files(
+            uploads,
+            local_model_path,
+            dataset_model_version_path,
+            parent_version_path=os.path.dirname(dataset_model_version_path)
+            + "/"
+            + str(parent_version),
+            unchanged_files=unchanged_files,
+        )
+
+    def reserve_versions(self, model_instances):
+        """Prepare the saves of several models with a few requests.
+
+        The Models dataset is checked once, the directory of every model name is created
+        if needed, and models without a version get consecutive versions after the
+        highest registered version of their name, requested once per name.
+        """
+        self._check_models_dataset()
+
+        models_by_name = {}
+        for model_instance in model_instances:
+            models_by_name.setdefault(model_instance._name, []).append(model_instance)
+
+        for name, models in models_by_name.items():
+            dataset_model_path = "Models/" + name
+            created = not self._dataset_api.path_exists(dataset_model_path)
+            if created:
+                self._dataset_api.mkdir(dataset_model_path)
+
+            unversioned = [m for m in models if m._version is None]
+            if not unversioned:
+                continue
+            taken = {m._version for m in models if m._version is not None}
+            # a directory created just now has no versions
+            version = 1 if created else self._next_version(name)
+            for model_instance in unversioned:
+                while version in taken:
+                    version += 1
+                model_instance._version = version
+                version += 1
+
+    def _check_models_dataset(self):
+        if not self._dataset_api.path_exists("Models"):
+            raise AssertionError(
+                "Models dataset does not exist in this project. Please enable the Serving service or create it manually."
+            )
+
+    def _next_version(self, name):
+        """Version following the highest registered version of a model.
+
+        A single request, whatever the number of versions. Versions being saved are
+        not registered yet, `_claim_version` moves on from them.
+        """
+        return self._models_api.get_latest_version(name) + 1
+
+    def _next_version_dir(self, name):
+        """Version following the highest version directory of a model.
+
+        Unlike `_next_version`, versions being saved or not registered yet are seen,
+        at the cost of listing every version directory of the model.
+        """
+        dataset_model_path = "Models/" + name
+        latest_version = 0
+        offset = 0
+        while True:
+            listing = self._dataset_api.list(dataset_model_path, offset=offset)
+            items = listing.get("items", []) if listing else []
+            for item in items:
+                file_name = os.path.basename(item["attributes"]["path"].rstrip("/"))
+                if file_name.isdigit():
+                    latest_version = max(latest_version, int(file_name))
+            offset += len(items)
+            if not items or offset >= listing.get("count", offset):
+                return latest_version + 1
+
+    def _claim_version(self, model_instance, auto_version):
+        """Create the directory of the model version.
+
+        The directory is created with a request failing if it already exists, so two
+        saves never claim the same version. With `auto_version`, a version whose
+        directory exists, being saved concurrently or left by a failed save, is skipped
+        for the version following the highest version directory of the model.
+
+        :return: path of the model version directory
+        :rtype: str
+        """
+        while True:
+            dataset_model_version_path = (
+                "Models/" + model_instance._name + "/" + str(model_instance._version)
+            )
             try:
-                zip_out_dir = tempfile.TemporaryDirectory(dir=os.getcwd())
-                archive_path = util.zip(zip_out_dir.name, local_model_path)
-                self._dataset_api.upload(archive_path, dataset_model_version_path)
+                self._engine.save(dataset_model_version_path)
+                return dataset_model_version_path
             except RestAPIError:
-                raise
-            finally:
-                if zip_out_dir is not None:
-                    zip_out_dir.cleanup()
+                if not self._dataset_api.path_exists(dataset_model_version_path):
+                    raise
+            if not auto_version:
+                raise ModelRegistryException(
+                    "Model with name {} and version {} already exists".format(
+                        model_instance._name, model_instance._version
+                    )
+                )
+            model_instance._version = max(
+                model_instance._version + 1,
+                self._next_version_dir(model_instance._name),
+            )
 
-            extracted_archive_path = (
-                dataset_model_version_path + "/" + os.path.basename(archive_path)
+    def _enter_phase(self, handle, phase):
+        if handle is not None:
+            handle._enter_phase(phase)
+
+    def _add_model_files(
+        self,
+        uploads,
+        local_model_path,
+        dataset_model_version_path,
+        parent_version_path=None,
+        unchanged_files=(),
+    ):
+        """Queue the upload of every file of the model directory to its final path.
+
+        Directories are created right away, so they exist before any file is uploaded.
+        Files listed in `unchanged_files` are copied on the server from the parent
+        version instead of being uploaded.
+        """
+        directories = []
+        files = []
+        for dirpath, dirnames, filenames in os.walk(local_model_path):
+            relative_dir = os.path.relpath(dirpath, local_model_path)
+            if relative_dir == os.curdir:
+                remote_dir = dataset_model_version_path
+            else:
+                remote_dir = (
+                    dataset_model_version_path + "/" + relative_dir.replace(os.sep, "/")
+                )
+            directories.extend(remote_dir + "/" + name for name in sorted(dirnames))
+            files.extend(
+                (os.path.join(dirpath, name), remote_dir)
+                for name in util.model_file_names(local_model_path, dirpath, filenames)
             )
 
-            self._dataset_api.unzip(extracted_archive_path, block=True, timeout=480)
+        unchanged_files = set(unchanged_files)
 
-            self._dataset_api.rm(extracted_archive_path)
+        # os.walk is top-down, so parents are created before their children
+        for directory in directories:
+            self._dataset_api.mkdir(directory)
 
-            unzipped_model_dir = (
-                dataset_model_version_path
-                + "/"
-                + os.path.splitext(os.path.basename(archive_path))[0]
+        for local_path, remote_dir in files:
+            relative_path = os.path.relpath(local_path, local_model_path).replace(
+                os.sep, "/"
+            )
+            if relative_path in unchanged_files:
+                uploads.copy(
+                    parent_version_path + "/" + relative_path,
+                    dataset_model_version_path + "/" + relative_path,
+                )
+            else:
+                uploads.upload(local_path, remote_dir)
+
+    def _archive_path(self, dataset_model_version_path):
+        """Path the model archive is uploaded to, next to the model version directory.
+
+        The archive is extracted into a directory named after it, so its files land
+        in the version directory without moving it.
+        """
+        return dataset_model_version_path + ".zip"
+
+    def _add_archive(
+        self, uploads, local_model_path, dataset_model_version_path, archive_dir
+    ):
+        """Zip the model directory locally and queue the upload of the archive."""
+        archive_path = self._archive_path(dataset_model_version_path)
+        local_archive_path = util.zip(
+            archive_dir, local_model_path, os.path.basename(dataset_model_version_path)
+        )
+        uploads.upload(
+            local_archive_path, os.path.dirname(archive_path), resumable=True
+        )
+        return archive_path
+
+    def _add_archive_stream(
+        self, uploads, local_model_path, dataset_model_version_path
+    ):
+        """Queue the upload of the model archive while it is being written."""
+        archive_path = self._archive_path(dataset_model_version_path)
+        size = util.zip_stream_size(local_model_path)
+        uploads.upload_stream(
+            os.path.dirname(archive_path),
+            os.path.basename(archive_path),
+            size,
+            lambda stream: util.zip_stream(stream, local_model_path),
+            resumable=True,
+        )
+        return archive_path
+
+    def _extract_archive(
+        self, dataset_model_version_path, archive_path, local_model_path
+    ):
+        """Extract an uploaded model archive into the model version directory.
+
+        The version directory is never removed, so it stays claimed by this save while
+        the archive is extracted. It exists before the extraction, so the extraction
+        is awaited on an entry of the archive appearing at its path in the version
+        directory instead. Should the server not extract into the existing directory,
+        the entry never appears and the save fails.
+        """
+        marker = self._archive_marker(local_model_path)
+        try:
+            if marker is not None:
+                self._dataset_api.unzip(
+                    archive_path,
+                    block=True,
+                    timeout=480,
+                    target_path=dataset_model_version_path + "/" + marker,
+                )
+            self._dataset_api.rm(archive_path)
+        except RestAPIError as e:
+            raise ModelRegistryException(
+                "Failed to extract model archive {} into {}: {}".format(
+                    archive_path, dataset_model_version_path, e
+                )
+            ) from e
+
+    def _archive_marker(self, local_model_path):
+        """Relative path of an entry of the model archive, a file if there is any.
+
+        Files the save uploads next to the archive are not considered, since they may
+        exist in the version directory before the archive is extracted.
+
+        :return: path using `/` as separator, `None` if the archive is empty
+        :rtype: str
+        """
+        first_dir = None
+        for dirpath, dirnames, filenames in os.walk(local_model_path):
+            dirnames.sort()
+            relative_dir = os.path.relpath(dirpath, local_model_path)
+            if relative_dir == os.curdir:
+                prefix = ""
+                filenames = [
+                    name for name in filenames if name not in self.ARTIFACT_FILE_NAMES
+                ]
+            else:
+                prefix = relative_dir.replace(os.sep, "/") + "/"
+            if filenames:
+                return prefix + sorted(filenames)[0]
+            if first_dir is None and dirnames:
+                first_dir = prefix + dirnames[0]
+        return first_dir
+
+    def download(
+        self, model_instance, download_mode=DOWNLOAD_MODE_ARCHIVE, local_path=None
+    ):
+        if download_mode not in self.DOWNLOAD_MODES:
+            raise ValueError(
+                "Download mode {} is not supported, use one of {}".format(
+                    download_mode, self.DOWNLOAD_MODES
+                )
             )
 
-            for artifact in os.listdir(local_model_path):
-                _, file_name = os.path.split(artifact)
-                for i in range(3):
-                    try:
-                        self._dataset_api.move(
-                            unzipped_model_dir + "/" + file_name,
-                            dataset_model_version_path + "/" + file_name,
-                        )
-                    except RestAPIError:
-                        time.sleep(1)
-                        pass
+        if local_path is not None:
+            # the files of other versions there may be modified, so they are copied
+            return self._download(
+                model_instance, download_mode, local_path, sync_versions=True
+            )
 
-            self._dataset_api.rm(unzipped_model_dir)
+        _client = client.get_instance()
+        model_cache = _client._model_cache
+        if model_cache is None:
+            return self._download(
+                model_instance, download_mode, os.getcwd() + "/" + str(uuid.uuid4())
+            )
 
-            if await_registration > 0:
-                sleep_seconds = 5
-                for i in range(int(await_registration / sleep_seconds)):
-                    try:
-                        time.sleep(sleep_seconds)
-                        print(
-                            "Polling "
-                            + model_instance.name
-                            + " version "
-                            + str(model_instance.version)
-                            + " for model availability."
-                        )
-                        model = self._models_api.get(
-                            name=model_instance.name, version=model_instance.version
-                        )
-                        if model is None:
-                            print(
-                                model_instance.name
-                                + " not ready yet, retrying in "
-                                + str(sleep_seconds)
-                                + " seconds."
-                            )
-                        else:
-                            print("Model is now registered.")
-                            return model
-                    except RestAPIError:
-                        pass
-                print(
-                    "Model not available during polling, set a higher value for await_registration to wait longer."
+        cached_path = model_cache.get(
+            _client._project_name, model_instance._name, model_instance._version
+        )
+        if cached_path is not None:
+            print(
+                "Model {} version {} found in the local cache".format(
+                    model_instance._name, model_instance._version
                 )
-        except BaseException as be:
-            self._dataset_api.rm(dataset_model_version_path)
-            raise be
-
-    def download(self, model_instance):
-        model_name_path = (
-            os.getcwd() + "/" + str(uuid.uuid4()) + "/" + model_instance._name
+            )
+            return cached_path
+
+        # cached files are never modified, so they are hardlinked
+        return model_cache.fetch(
+            _client._project_name,
+            model_instance._name,
+            model_instance._version,
+            lambda staging_dir: self._download(
+                model_instance,
+                download_mode,
+                staging_dir,
+                sync_versions=True,
+                versions_dir=model_cache.model_dir(
+                    _client._project_name, model_instance._name
+                ),
+                link=True,
+            ),
         )
+
+    def _download(
+        self,
+        model_instance,
+        download_mode,
+        download_dir,
+        sync_versions=False,
+        versions_dir=None,
+        link=False,
+    ):
+        """Download a model version to `<download_dir>/<name>/<version>`.
+
+        With `sync_versions`, if `versions_dir` holds another downloaded version of the
+        model, only files whose content differs from it are downloaded.
+
+        :param versions_dir: directory holding downloaded versions of the model,
+            defaults to `<download_dir>/<name>`
+        :type versions_dir: str
+        :param link: whether to hardlink unchanged files rather than copying them
+        :type link: bool
+        """
+        model_name_path = download_dir + "/" + model_instance._name
         model_version_path = model_name_path + "/" + str(model_instance._version)
         zip_path = model_version_path + ".zip"
-        os.makedirs(model_name_path)
+        if os.path.exists(model_version_path):
+            raise ValueError(
+                "Model {} version {} already exists in {}".format(
+                    model_instance._name, model_instance._version, download_dir
+                )
+            )
+        os.makedirs(model_name_path, exist_ok=True)
         dataset_model_name_path = "Models/" + model_instance._name
         dataset_model_version_path = (
             dataset_model_name_path + "/" + str(model_instance._version)
         )
 
+        if sync_versions:
+            if versions_dir is None:
+                versions_dir = model_name_path
+            base_version_path = self._find_base_version(
+                versions_dir, model_instance._version
+            )
+            if base_version_path is not None:
+                manifest = self._read_manifest(
+                    model_instance._name, model_instance._version
+                )
+                if manifest is not None:
+                    self._sync_files(
+                        dataset_model_version_path,
+                        model_version_path,
+                        manifest,
+                        base_version_path,
+                        link,
+                    )
+                    return model_version_path
+
+        if download_mode == self.DOWNLOAD_MODE_FILES:
+            self._download_files(dataset_model_version_path, model_version_path)
+            return model_version_path
+
         temp_download_dir = "/Resources" + "/" + str(uuid.uuid4())
         try:
             self._dataset_api.mkdir(temp_download_dir)
@@ -241,13 +826,19 @@ class Engine:
                 block=True,
                 timeout=480,
             )
-            self._dataset_api.download(
-                temp_download_dir + "/" + str(model_instance._version) + ".zip",
-                zip_path,
+            remote_zip_path = (
+                temp_download_dir + "/" + str(model_instance._version) + ".zip"
             )
-            self._dataset_api.rm(temp_download_dir)
-            util.unzip(zip_path, extract_dir=model_name_path)
-            os.remove(zip_path)
+            if download_mode == self.DOWNLOAD_MODE_STREAM:
+                # entries are extracted as the archive arrives, it is never stored
+                with self._dataset_api.download_stream(remote_zip_path) as stream:
+                    util.unzip_stream(stream, model_name_path)
+                self._dataset_api.rm(temp_download_dir)
+            else:
+                self._dataset_api.download(remote_zip_path, zip_path)
+                self._dataset_api.rm(temp_download_dir)
+                util.unzip(zip_path, extract_dir=model_name_path)
+                os.remove(zip_path)
         except BaseException as be:
             raise be
         finally:
@@ -257,41 +848,157 @@ class Engine:
 
         return model_version_path
 
-    def read_input_example(self, model_instance):
-        try:
-            tmp_dir = tempfile.TemporaryDirectory(dir=os.getcwd())
-            self._dataset_api.download(
-                model_instance._input_example, tmp_dir.name + "/inputs.json"
+    def _find_base_version(self, versions_dir, version):
+        """Local path of the downloaded version of a model closest to `version`.
+
+        Only versions downloaded with their manifest are considered, preferring the
+        closest older version.
+
+        :return: path of the version directory, or `None` if there is none
+        :rtype: str
+        """
+        if not os.path.isdir(versions_dir):
+            return None
+        candidates = []
+        for name in os.listdir(versions_dir):
+            path = os.path.join(versions_dir, name)
+            if (
+                name.isdigit()
+                and int(name) != version
+                and os.path.isfile(os.path.join(path, self.MANIFEST_FILE_NAME))
+            ):
+                candidates.append((int(name) > version, abs(int(name) - version), path))
+        if not candidates:
+            return None
+        return min(candidates)[2]
+
+    def _sync_files(
+        self, dataset_model_version_path, model_version_path, manifest, base_path, link
+    ):
+        """Download a model version, reusing the unchanged files of a local version.
+
+        Files whose size and content hash in the manifest of the version match the
+        manifest of the local version are hardlinked or copied from it, the others are
+        downloaded. The manifest is only trusted for files whose size in datasets
+        matches it. Without `link`, the content hash of copied files is verified, as the
+        local files may have been modified since they were downloaded.
+        """
+        with open(os.path.join(base_path, self.MANIFEST_FILE_NAME), "r") as f:
+            base_manifest = json.load(f)
+
+        entries = self._dataset_api.list_files(dataset_model_version_path)
+        os.makedirs(model_version_path)
+        files = []
+        reused = 0
+        for relative_path, is_dir, size in entries:
+            local_path = os.path.join(model_version_path, *relative_path.split("/"))
+            if is_dir:
+                os.makedirs(local_path, exist_ok=True)
+                continue
+            entry = manifest["files"].get(relative_path)
+            if (
+                entry is not None
+                and entry["size"] == size
+                and base_manifest["files"].get(relative_path) == entry
+                and self._reuse_file(
+                    os.path.join(base_path, *relative_path.split("/")),
+                    local_path,
+                    entry,
+                    link,
+                )
+            ):
+                reused += 1
+            else:
+                files.append(
+                    (dataset_model_version_path + "/" + relative_path, local_path)
+                )
+
+        print(
+            "Reusing {} unchanged files from {}, downloading {} files.".format(
+                reused, base_path, len(files)
             )
-            with open(tmp_dir.name + "/inputs.json", "rb") as f:
-                return json.loads(f.read())
-        finally:
-            if tmp_dir is not None and os.path.exists(tmp_dir.name):
-                tmp_dir.cleanup()
+        )
+        self._download_file_list(files)
 
-    def read_environment(self, model_instance):
+    def _reuse_file(self, base_file_path, local_path, entry, link):
+        """Hardlink or copy a file of a local version, `False` if it can not be reused."""
         try:
-            tmp_dir = tempfile.TemporaryDirectory(dir=os.getcwd())
-            self._dataset_api.download(
-                model_instance._environment[0], tmp_dir.name + "/environment.yml"
-            )
-            with open(tmp_dir.name + "/environment.yml", "r") as f:
-                return f.read()
-        finally:
-            if tmp_dir is not None and os.path.exists(tmp_dir.name):
-                tmp_dir.cleanup()
+            if link:
+                try:
+                    os.link(base_file_path, local_path)
+                    return True
+                except OSError:
+                    # hardlinks across filesystems or unsupported, copy instead
+                    pass
+            shutil.copy2(base_file_path, local_path)
+            if not link and util.file_sha256(local_path) != entry["sha256"]:
+                os.remove(local_path)
+                return False
+            return True
+        except OSError:
+            # the local version was removed in the meantime
+            return False
+
+    def _download_files(self, dataset_model_version_path, model_version_path):
+        """Download every file of a model version directly, without an archive."""
+        entries = self._dataset_api.list_files(dataset_model_version_path)
+
+        os.makedirs(model_version_path)
+        files = []
+        for relative_path, is_dir, _ in entries:
+            local_path = os.path.join(model_version_path, *relative_path.split("/"))
+            if is_dir:
+                os.makedirs(local_path, exist_ok=True)
+            else:
+                files.append(
+                    (dataset_model_version_path + "/" + relative_path, local_path)
+                )
+        self._download_file_list(files)
+
+    def _download_file_list(self, files):
+        """Download files concurrently.
+
+        The download concurrency of the connection is split between files and the byte
+        ranges of each file, so the requests in flight stay within it.
+
+        :param files: remote and local path of every file to download
+        :type files: list
+        """
+        if not files:
+            return
+
+        download_concurrency = client.get_instance()._download_concurrency
+        file_concurrency = max(min(download_concurrency, len(files)), 1)
+        range_concurrency = max(download_concurrency // file_concurrency, 1)
+        with ThreadPoolExecutor(max_workers=file_concurrency) as executor:
+            futures = [
+                executor.submit(
+                    self._dataset_api.download,
+                    remote_path,
+                    local_path,
+                    max_concurrency=range_concurrency,
+                )
+                for remote_path, local_path in files
+            ]
+            for future in futures:
+                future.result()
+
+    def _read_manifest(self, name, version):
+        """Read the manifest of a model version, `None` if it was saved without one."""
+        manifest_path = "Models/" + name + "/" + str(version) + "/"
+        manifest_path += self.MANIFEST_FILE_NAME
+        if not self._dataset_api.path_exists(manifest_path):
+            return None
+        return json.loads(self._dataset_api.read(manifest_path))
+
+    def read_input_example(self, model_instance):
+        return json.loads(self._dataset_api.read(model_instance._input_example))
+
+    def read_environment(self, model_instance):
+        return self._dataset_api.read(model_instance._environment[0]).decode("utf-8")
 
     def read_signature(self, model_instance):
-        try:
-            tmp_dir = tempfile.TemporaryDirectory(dir=os.getcwd())
-            self._dataset_api.download(
-                model_instance._signature, tmp_dir.name + "/signature.json"
-            )
-            with open(tmp_dir.name + "/signature.json", "rb") as f:
-                return json.loads(f.read())
-        finally:
-            if tmp_dir is not None and os.path.exists(tmp_dir.name):
-                tmp_dir.cleanup()
+        return json.loads(self._dataset_api.read(model_instance._signature))
 
     def add_tag(self, model, name, value):
         """Attach a name/value tag to a feature group."""
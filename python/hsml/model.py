@@ -19,7 +19,7 @@ import humps
 
 from hsml import util
 
-from hsml.core import models_api, dataset_api
+from hsml.core import models_api, dataset_api, save_handle
 
 from hsml.engine import models_engine
 
@@ -89,15 +89,126 @@ class Model:
         self._dataset_api = dataset_api.DatasetApi()
         self._models_engine = models_engine.Engine()
 
-    def save(self, model_path, await_registration=480):
-        """Persist the model metadata object to the model registry."""
+    def save(
+        self,
+        model_path,
+        await_registration=480,
+        upload_mode="archive",
+        parent_version=None,
+        upload_retries=10,
+    ):
+        """Persist the model metadata object to the model registry.
+
+        # Arguments
+            model_path: Local path to the directory of the model files.
+            await_registration: Seconds to wait for the model to be registered,
+                defaults to `480`.
+            upload_mode: How the model files are uploaded. `"archive"` zips the model
+                directory locally before uploading it, `"stream"` uploads the archive
+                while it is being written, without storing it on local disk. Stream
+                archives are not compressed. `"files"` uploads every file directly to
+                its final location, concurrently and without an archive, which suits
+                models made of a few large files. Defaults to `"archive"`.
+            parent_version: Version of the same model to deduplicate files against.
+                Files whose content hash matches the manifest of that version are
+                copied on the server instead of being uploaded, and the remaining
+                files are uploaded individually as with `"files"`. Defaults to `None`.
+            upload_retries: Number of failed chunk requests to retry per uploaded file.
+                Chunks failing with a connection error or a transient HTTP status are
+                re-sent with exponential backoff, honoring `Retry-After`. Defaults to
+                `10`.
+        # Returns
+            `Model`: The registered model metadata object.
+        """
         return self._models_engine.save(
-            self, model_path, await_registration=await_registration
+            self,
+            model_path,
+            await_registration=await_registration,
+            upload_mode=upload_mode,
+            parent_version=parent_version,
+            upload_retries=upload_retries,
+        )
+
+    def save_async(
+        self,
+        model_path,
+        await_registration=480,
+        upload_mode="archive",
+        parent_version=None,
+        upload_retries=10,
+    ):
+        """Persist the model metadata object to the model registry in the background.
+
+        Runs `save` on a background thread and returns right away. The returned handle
+        reports the current phase of the save, waits for its result and cancels it.
+        Running saves complete before the interpreter exits.
+
+        !!! example
+            ```python
+            handle = model.save_async("/tmp/model")
+            # keep training
+            registered_model = handle.result(timeout=600)
+            ```
+
+        # Arguments
+            model_path: Local path to the directory of the model files.
+            await_registration: Seconds to wait for the model to be registered,
+                defaults to `480`.
+            upload_mode: How the model files are uploaded, see `save`. Defaults to
+                `"archive"`.
+            parent_version: Version of the same model to deduplicate files against,
+                see `save`. Defaults to `None`.
+            upload_retries: Number of failed chunk requests to retry per uploaded file,
+                defaults to `10`.
+        # Returns
+            `SaveHandle`: Handle of the save, whose `result()` is the registered model
+                metadata object.
+        """
+        handle = save_handle.SaveHandle()
+        handle._start(
+            self._models_engine.save,
+            self,
+            model_path,
+            await_registration=await_registration,
+            upload_mode=upload_mode,
+            parent_version=parent_version,
+            upload_retries=upload_retries,
+            handle=handle,
         )
+        return handle
+
+    def download(self, download_mode="archive", local_path=None):
+        """Download the model files to a local folder.
 
-    def download(self):
-        """Download the model files to a local folder."""
-        return self._models_engine.download(self)
+        # Arguments
+            download_mode: How the model files are downloaded. `"archive"` downloads
+                the zipped model version to local disk before extracting it, `"stream"`
+                extracts the files to their final paths while the archive is being
+                downloaded, so it is never stored locally. `"files"` downloads every
+                file of the version directly and concurrently, without zipping the
+                version on the server first. Defaults to `"archive"`.
+            local_path: Local directory to download the model version into, as
+                `<local_path>/<name>/<version>`. Defaults to `None`, which downloads
+                into the model cache if the connection has a `cache_dir`, or into a new
+                directory of the working directory otherwise.
+
+        If the connection has a `cache_dir`, model versions are downloaded into the
+        cache, and downloading a cached version again returns the cached files
+        without any transfer. Cached files must not be modified. They are not evicted
+        from the cache until the process exits, or until the version is released with
+        `connection.model_cache.release(project, name, version)`.
+
+        If another version of the model was downloaded into the same directory, or is
+        in the cache, only the files whose content changed since that version are
+        downloaded, one by one. The other files are hardlinked from the cached
+        version, or copied from the local version after checking their content hash.
+
+        # Returns
+            `str`: Local path of the downloaded model version.
+        """
+        return self._models_engine.download(
+            self, download_mode=download_mode, local_path=local_path
+        )
 
     def delete(self):
         """Delete the model
@@ -16,9 +16,11 @@
 
 import warnings
 import humps
+from concurrent.futures import ThreadPoolExecutor
 
-from hsml import util
+from hsml import client, util
 from hsml.core import models_api
+from hsml.engine import models_engine
 from hsml.tensorflow import signature as tensorflow_signature  # noqa: F401
 from hsml.python import signature as python_signature  # noqa: F401
 from hsml.sklearn import signature as sklearn_signature  # noqa: F401
@@ -27,6 +29,8 @@ from hsml.torch import signature as torch_signature  # noqa: F401
 
 class ModelRegistry:
     DEFAULT_VERSION = 1
+    DEFAULT_PREFETCH_CONCURRENCY = 4
+    DEFAULT_SAVE_CONCURRENCY = 4
 
     def __init__(self, project_name, project_id):
         self._project_name = project_name
@@ -103,6 +107,127 @@ class ModelRegistry:
         else:
             return None
 
+    def prefetch(
+        self,
+        models: list,
+        download_mode: str = "archive",
+        max_concurrency: int = DEFAULT_PREFETCH_CONCURRENCY,
+    ):
+        """Download many model versions into the local cache in the background.
+
+        Model versions are resolved and downloaded concurrently, at most
+        `max_concurrency` at a time, and the call returns right away. Once the future
+        of a model version is done, downloading it returns the cached files without any
+        transfer.
+
+        !!! example
+            ```python
+            futures = mr.prefetch([("mnist", 1), ("mnist", 2), ("churn", 4)])
+            local_path = futures[0].result()
+            ```
+
+        # Arguments
+            models: List of `(name, version)` tuples of the model versions to download.
+            download_mode: How the model files are downloaded, see `Model.download`.
+                Defaults to `"archive"`.
+            max_concurrency: Number of model versions to download concurrently,
+                defaults to `4`.
+        # Returns
+            `List[concurrent.futures.Future]`: A future per model version, in the order
+                of `models`, resolving to the local path of the model version.
+        """
+        if client.get_instance()._model_cache is None:
+            warnings.warn(
+                "The connection has no `cache_dir`, prefetched model versions will not "
+                "be reused by later downloads."
+            )
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        futures = [
+            executor.submit(self._prefetch, name, version, download_mode)
+            for name, version in models
+        ]
+        # the workers exit once the queued downloads are done
+        executor.shutdown(wait=False)
+        return futures
+
+    def _prefetch(self, name, version, download_mode):
+        return self._models_api.get(name, version).download(download_mode=download_mode)
+
+    def save_many(
+        self,
+        models: list,
+        await_registration: int = 480,
+        upload_mode: str = "archive",
+        upload_retries: int = 10,
+        max_concurrency: int = DEFAULT_SAVE_CONCURRENCY,
+    ):
+        """Save many models at once, for instance the trials of a hyperparameter sweep.
+
+        The Models dataset is checked once and models without a version get
+        consecutive versions up front, with a single request per model name. The models
+        are then saved concurrently, at most `max_concurrency` at a time, sharing the
+        upload concurrency of the connection. A failing save does not abort the others.
+
+        !!! example
+            ```python
+            models = [
+                (mr.python.create_model("sweep", metrics=trial.metrics), trial.path)
+                for trial in trials
+            ]
+            for result in mr.save_many(models):
+                if isinstance(result, Exception):
+                    print("Failed:", result)
+            ```
+
+        # Arguments
+            models: List of `(model, model_path)` tuples of the models to save and the
+                local paths of their model files.
+            await_registration: Seconds to wait for every model to be registered,
+                defaults to `480`.
+            upload_mode: How the model files are uploaded, see `Model.save`. Defaults
+                to `"archive"`.
+            upload_retries: Number of failed chunk requests to retry per uploaded file,
+                defaults to `10`.
+            max_concurrency: Number of models to save concurrently, defaults to `4`.
+        # Returns
+            `list`: For every model, in the order of `models`, the registered model
+                metadata object, `None` if it was not available by the end of
+                `await_registration`, or the exception its save failed with.
+        # Raises
+            `RestAPIError`: If the model versions could not be reserved.
+        """
+        # reserved versions may still be taken by saves of other clients
+        auto_versions = [model._version is None for model, _ in models]
+        models_engine.Engine().reserve_versions([model for model, _ in models])
+
+        upload_concurrency = max(
+            client.get_instance()._upload_concurrency // max_concurrency, 1
+        )
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = [
+                executor.submit(
+                    model._models_engine.save,
+                    model,
+                    model_path,
+                    await_registration=await_registration,
+                    upload_mode=upload_mode,
+                    upload_retries=upload_retries,
+                    upload_concurrency=upload_concurrency,
+                    reserved=True,
+                    auto_version=auto_version,
+                )
+                for (model, model_path), auto_version in zip(models, auto_versions)
+            ]
+
+        results = [
+            future.exception() if future.exception() is not None else future.result()
+            for future in futures
+        ]
+        failed = sum(isinstance(result, Exception) for result in results)
+        print("Saved {} of {} models.".format(len(results) - failed, len(results)))
+        return results
+
     @property
     def project_name(self):
         """Name of the project in which the model registry is located."""
@@ -14,8 +14,14 @@
 #   limitations under the License.
 #
 
+import os
+import hashlib
 import shutil
 import datetime
+import struct
+import tempfile
+import zipfile
+import zlib
 
 from typing import Union
 import numpy as np
@@ -31,6 +37,11 @@ from hsml.model import Model as BaseModel
 
 from six import string_types
 
+ZIP_STREAM_BUFFER_SIZE = 1048576
+# manifest of a model version, written at the root of its directory, the
+# `MANIFEST_FILE_NAME` of the models engine, which imports this module
+MODEL_MANIFEST_FILE_NAME = ".hsml_manifest.json"
+
 
 class VersionWarning(Warning):
     pass
@@ -138,14 +149,371 @@ def _handle_dataframe_input(input_ex):
         )
 
 
-def zip(zip_file_path, dir_to_zip_path):
-    return shutil.make_archive(zip_file_path + "/archive", "zip", dir_to_zip_path)
+def zip(zip_file_path, dir_to_zip_path, archive_name="archive"):
+    """Write a zip archive of a model directory, without its manifest.
+
+    :return: path of the archive
+    :rtype: str
+    """
+    archive_path = os.path.join(zip_file_path, archive_name + ".zip")
+    with open(archive_path, "wb") as f:
+        _write_zip(f, dir_to_zip_path, compression=zipfile.ZIP_DEFLATED)
+    return archive_path
+
+
+def zip_stream(fileobj, dir_to_zip_path):
+    """Write a zip archive of a directory to a file-like object.
+
+    Entries are stored without compression, so the size of the archive can be known
+    before it is written, see `zip_stream_size`. The archive holds the same entries as
+    the one written by `zip`.
+    """
+    _write_zip(fileobj, dir_to_zip_path)
+
+
+def zip_stream_size(dir_to_zip_path):
+    """Size in bytes of the archive `zip_stream` writes for a directory."""
+    counter = _ByteCounter()
+    # file content does not change the size of stored entries, skip reading it
+    _write_zip(counter, dir_to_zip_path, read_files=False)
+    return counter.size
+
+
+def _write_zip(
+    fileobj, dir_to_zip_path, read_files=True, compression=zipfile.ZIP_STORED
+):
+    zeros = memoryview(bytes(ZIP_STREAM_BUFFER_SIZE))
+    with zipfile.ZipFile(fileobj, "w", compression=compression) as zf:
+        for dirpath, dirnames, filenames in os.walk(dir_to_zip_path):
+            dirnames.sort()
+            for name in dirnames:
+                path = os.path.join(dirpath, name)
+                zf.write(path, os.path.relpath(path, dir_to_zip_path))
+            for name in model_file_names(dir_to_zip_path, dirpath, filenames):
+                path = os.path.join(dirpath, name)
+                zinfo = zipfile.ZipInfo.from_file(
+                    path, os.path.relpath(path, dir_to_zip_path)
+                )
+                zinfo.compress_type = compression
+                with zf.open(zinfo, "w") as dest:
+                    if read_files:
+                        with open(path, "rb") as src:
+                            shutil.copyfileobj(src, dest, ZIP_STREAM_BUFFER_SIZE)
+                    else:
+                        remaining = zinfo.file_size
+                        while remaining > 0:
+                            n = min(remaining, ZIP_STREAM_BUFFER_SIZE)
+                            dest.write(zeros[:n])
+                            remaining -= n
+
+
+class _ByteCounter:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def model_file_names(local_model_path, dirpath, filenames):
+    """Sorted names of the model files in a directory listed by `os.walk`.
+
+    A manifest at the root of the model directory, left there by a download, describes
+    another version and is not a model file.
+    """
+    if dirpath == local_model_path:
+        filenames = [name for name in filenames if name != MODEL_MANIFEST_FILE_NAME]
+    return sorted(filenames)
+
+
+def model_manifest(local_model_path):
+    """Relative path, size and content hash of every file in a model directory.
+
+    Relative paths use `/` as separator, whatever the local platform. A manifest at
+    the root of the directory is not listed.
+    """
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(local_model_path):
+        dirnames.sort()
+        for name in model_file_names(local_model_path, dirpath, filenames):
+            path = os.path.join(dirpath, name)
+            relative_path = os.path.relpath(path, local_model_path).replace(os.sep, "/")
+            files[relative_path] = {
+                "size": os.path.getsize(path),
+                "sha256": file_sha256(path),
+            }
+    return {"files": files}
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(ZIP_STREAM_BUFFER_SIZE), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
 
 
 def unzip(zip_file_path, extract_dir=None):
     return shutil.unpack_archive(zip_file_path, extract_dir=extract_dir)
 
 
+def unzip_stream(fileobj, extract_dir):
+    """Extract a zip archive while reading it sequentially from a file-like object.
+
+    Entries are written to their final paths as their data arrives, using the sizes
+    of their local headers. Entries whose local header lacks sizes, as written by
+    streaming zip writers, are buffered in a temporary file until the data descriptor
+    which follows them confirms their size and checksum.
+    """
+    reader = _ZipStreamReader(fileobj)
+    extract_dir = os.path.abspath(extract_dir)
+    while True:
+        signature = reader.read_exact(4, allow_eof=True)
+        if signature != _ZIP_LOCAL_HEADER_SIGNATURE:
+            # the central directory follows the last entry
+            if signature not in (
+                b"",
+                _ZIP_CENTRAL_DIRECTORY_SIGNATURE,
+                _ZIP_END_SIGNATURE,
+            ):
+                raise zipfile.BadZipFile("Bad local file header in zip stream")
+            return
+
+        (
+            flags,
+            method,
+            crc,
+            compressed_size,
+            size,
+            name_length,
+            extra_length,
+        ) = _unpack_local_header(reader.read_exact(26))
+        raw_name = reader.read_exact(name_length)
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        extra = reader.read_exact(extra_length)
+        zip64_sizes = _zip64_extra_sizes(extra, size, compressed_size)
+        if zip64_sizes is not None:
+            size, compressed_size = zip64_sizes
+
+        if flags & 0x1:
+            raise zipfile.BadZipFile(
+                "Encrypted zip entry {} is not supported".format(name)
+            )
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise zipfile.BadZipFile(
+                "Compression method {} of zip entry {} is not supported".format(
+                    method, name
+                )
+            )
+
+        target_path = _zip_entry_path(extract_dir, name)
+        if name.endswith("/"):
+            os.makedirs(target_path, exist_ok=True)
+            if flags & 0x8:
+                _buffer_zip_entry(
+                    reader, _ByteCounter(), name, method, zip64_sizes is not None
+                )
+            else:
+                reader.read_exact(compressed_size)
+            continue
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+        if flags & 0x8:
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(target_path), delete=False
+            ) as buffer:
+                try:
+                    _buffer_zip_entry(
+                        reader, buffer, name, method, zip64_sizes is not None
+                    )
+                except BaseException:
+                    buffer.close()
+                    os.remove(buffer.name)
+                    raise
+            os.replace(buffer.name, target_path)
+        else:
+            with open(target_path, "wb") as out:
+                entry_crc = _copy_zip_entry(reader, out, method, compressed_size)
+            if entry_crc != crc or os.path.getsize(target_path) != size:
+                raise zipfile.BadZipFile("Bad CRC-32 for zip entry {}".format(name))
+
+
+_ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_ZIP_CENTRAL_DIRECTORY_SIGNATURE = b"PK\x01\x02"
+_ZIP_END_SIGNATURE = b"PK\x05\x06"
+_ZIP_DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+
+
+def _unpack_local_header(header):
+    # version, flags, method, time, date, crc, sizes, name and extra lengths
+    fields = struct.unpack("<HHHHHIIIHH", header)
+    return fields[1], fields[2], fields[5], fields[6], fields[7], fields[8], fields[9]
+
+
+def _zip64_extra_sizes(extra, size, compressed_size):
+    """Sizes of a zip64 entry from its extra field, `None` if the entry is not zip64."""
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, data_size = struct.unpack("<HH", extra[offset : offset + 4])
+        if header_id == 0x0001:
+            data = extra[offset + 4 : offset + 4 + data_size]
+            values = list(struct.unpack("<%dQ" % (len(data) // 8), data))
+            if size == 0xFFFFFFFF and values:
+                size = values.pop(0)
+            if compressed_size == 0xFFFFFFFF and values:
+                compressed_size = values.pop(0)
+            return size, compressed_size
+        offset += 4 + data_size
+    return None
+
+
+def _zip_entry_path(extract_dir, name):
+    """Local path of a zip entry, which must not escape the extraction directory."""
+    path = os.path.normpath(os.path.join(extract_dir, name))
+    if name.endswith("/"):
+        path += os.sep
+    if os.path.commonpath([extract_dir, path]) != extract_dir:
+        raise zipfile.BadZipFile(
+            "Zip entry {} is outside of {}".format(name, extract_dir)
+        )
+    return path
+
+
+def _copy_zip_entry(reader, out, method, compressed_size):
+    """Copy the data of an entry with a known size, returning its CRC-32."""
+    decompressor = zlib.decompressobj(-15) if method == zipfile.ZIP_DEFLATED else None
+    crc = 0
+    remaining = compressed_size
+    while remaining > 0:
+        data = reader.read_exact(min(remaining, ZIP_STREAM_BUFFER_SIZE))
+        remaining -= len(data)
+        if decompressor is not None:
+            data = decompressor.decompress(data)
+        crc = zlib.crc32(data, crc)
+        out.write(data)
+    if decompressor is not None:
+        data = decompressor.flush()
+        crc = zlib.crc32(data, crc)
+        out.write(data)
+    return crc
+
+
+def _buffer_zip_entry(reader, buffer, name, method, zip64):
+    """Copy an entry whose sizes follow its data in a data descriptor to a buffer."""
+    if method == zipfile.ZIP_DEFLATED:
+        crc, compressed_size, size = _buffer_deflated_zip_entry(reader, buffer)
+        descriptor = _read_zip_data_descriptor(reader, zip64)
+    else:
+        crc, size, descriptor = _buffer_stored_zip_entry(reader, buffer, zip64)
+        compressed_size = size
+    if descriptor != (crc, compressed_size, size):
+        raise zipfile.BadZipFile("Bad CRC-32 for zip entry {}".format(name))
+
+
+def _buffer_deflated_zip_entry(reader, buffer):
+    """Inflate an entry up to the end of its deflate stream."""
+    decompressor = zlib.decompressobj(-15)
+    crc = 0
+    compressed_size = 0
+    size = 0
+    while not decompressor.eof:
+        data = reader.read(ZIP_STREAM_BUFFER_SIZE)
+        if not data:
+            raise zipfile.BadZipFile("Unexpected end of zip stream")
+        compressed_size += len(data)
+        data = decompressor.decompress(data)
+        crc = zlib.crc32(data, crc)
+        size += len(data)
+        buffer.write(data)
+    reader.unread(decompressor.unused_data)
+    compressed_size -= len(decompressor.unused_data)
+    return crc, compressed_size, size
+
+
+def _read_zip_data_descriptor(reader, zip64):
+    """Read a data descriptor, whose signature is optional."""
+    sizes_format = "<QQ" if zip64 else "<II"
+    sizes_length = struct.calcsize(sizes_format)
+    data = reader.read_exact(4)
+    if data == _ZIP_DATA_DESCRIPTOR_SIGNATURE:
+        data = reader.read_exact(4)
+    (crc,) = struct.unpack("<I", data)
+    return (crc,) + struct.unpack(sizes_format, reader.read_exact(sizes_length))
+
+
+def _buffer_stored_zip_entry(reader, buffer, zip64):
+    """Copy a stored entry up to the data descriptor matching its CRC-32 and size.
+
+    A stored entry carries no end marker, so its end is the first signed data
+    descriptor whose CRC-32 and sizes match the data before it.
+    """
+    sizes_format = "<QQ" if zip64 else "<II"
+    descriptor_length = 8 + struct.calcsize(sizes_format)
+    crc = 0
+    size = 0
+    window = bytearray()
+    while True:
+        data = reader.read(ZIP_STREAM_BUFFER_SIZE)
+        if not data:
+            raise zipfile.BadZipFile("Unexpected end of zip stream")
+        window += data
+
+        index = window.find(_ZIP_DATA_DESCRIPTOR_SIGNATURE)
+        while index >= 0 and index + descriptor_length <= len(window):
+            candidate_crc = zlib.crc32(window[:index], crc)
+            candidate_size = size + index
+            descriptor = struct.unpack(
+                "<I", window[index + 4 : index + 8]
+            ) + struct.unpack(
+                sizes_format, window[index + 8 : index + descriptor_length]
+            )
+            if descriptor == (candidate_crc, candidate_size, candidate_size):
+                buffer.write(window[:index])
+                reader.unread(bytes(window[index + descriptor_length :]))
+                return candidate_crc, candidate_size, descriptor
+            index = window.find(_ZIP_DATA_DESCRIPTOR_SIGNATURE, index + 1)
+
+        # keep the bytes which may still start a data descriptor
+        keep = index if index >= 0 else max(len(window) - 3, 0)
+        crc = zlib.crc32(window[:keep], crc)
+        size += keep
+        buffer.write(window[:keep])
+        del window[:keep]
+
+
+class _ZipStreamReader:
+    """Sequential reader over a file-like object, which can push bytes back."""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._pending = b""
+
+    def read(self, size):
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+            return data
+        return self._fileobj.read(size)
+
+    def read_exact(self, size, allow_eof=False):
+        parts = []
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                if allow_eof and not parts:
+                    return b""
+                raise zipfile.BadZipFile("Unexpected end of zip stream")
+            parts.append(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data):
+        self._pending = bytes(data) + self._pending
+
+
 def validate_metrics(metrics):
     if not isinstance(metrics, dict):
         raise TypeError(
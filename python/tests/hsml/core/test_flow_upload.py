@@ -0,0 +1,103 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import threading
+
+from hsml.core.flow_upload import FlowUploadStream
+
+
+class RecordingDatasetApi:
+    """Records the chunks sent by a stream, as they were when they were sent."""
+
+    def __init__(self, before_send=None):
+        self.chunks = []
+        self._lock = threading.Lock()
+        self._before_send = before_send
+
+    def _upload_chunk(self, params, path, file_name, chunk, *args):
+        if self._before_send is not None:
+            self._before_send.wait()
+        with self._lock:
+            self.chunks.append(
+                (
+                    params["flowChunkNumber"],
+                    params["flowCurrentChunkSize"],
+                    bytes(chunk),
+                )
+            )
+
+
+def stream(dataset_api, size, chunk_size=1000, max_concurrency=1):
+    base_params = {
+        "flowFilename": "archive.zip",
+        "flowTotalSize": size,
+        "flowChunkSize": chunk_size,
+        "flowTotalChunks": max((size + chunk_size - 1) // chunk_size, 1),
+    }
+    return FlowUploadStream(
+        dataset_api, "Models/m/1", base_params, max_concurrency=max_concurrency
+    )
+
+
+def test_last_write_larger_than_chunk_is_split():
+    dataset_api = RecordingDatasetApi()
+    with stream(dataset_api, 2500) as upload:
+        upload.write(b"x" * 2500)
+
+    assert [(number, size) for number, size, _ in dataset_api.chunks] == [
+        (1, 1000),
+        (2, 1000),
+        (3, 500),
+    ]
+
+
+def test_writes_are_cut_at_chunk_boundaries():
+    dataset_api = RecordingDatasetApi()
+    with stream(dataset_api, 2500) as upload:
+        upload.write(b"a" * 700)
+        upload.write(b"b" * 1000)
+        upload.write(b"c" * 800)
+
+    assert sorted(dataset_api.chunks) == [
+        (1, 1000, b"a" * 700 + b"b" * 300),
+        (2, 1000, b"b" * 700 + b"c" * 300),
+        (3, 500, b"c" * 500),
+    ]
+
+
+def test_empty_upload_sends_one_empty_chunk():
+    dataset_api = RecordingDatasetApi()
+    with stream(dataset_api, 0):
+        pass
+
+    assert dataset_api.chunks == [(1, 0, b"")]
+
+
+def test_reused_buffer_does_not_change_chunks_in_flight():
+    before_send = threading.Event()
+    dataset_api = RecordingDatasetApi(before_send)
+    upload = stream(dataset_api, 2000, max_concurrency=3)
+    buffer = bytearray(b"a" * 1000)
+    upload.write(buffer)
+    buffer[:] = b"b" * 1000
+    upload.write(buffer)
+    before_send.set()
+    upload.close()
+
+    assert sorted(dataset_api.chunks) == [
+        (1, 1000, b"a" * 1000),
+        (2, 1000, b"b" * 1000),
+    ]
@@ -0,0 +1,246 @@
+#
+#   Copyright 2021 Logical Clocks AB
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+
+import contextlib
+import io
+import json
+import os
+import threading
+import zipfile
+
+import pytest
+
+from hsml import client, util
+from hsml.client.exceptions import RestAPIError
+from hsml.engine import models_engine
+from hsml.model import Model
+
+
+class FakeResponse:
+    status_code = 400
+    reason = "Bad Request"
+
+    def json(self):
+        return {"errorMsg": "Destination already exists"}
+
+
+class FakeDatasetApi:
+    """In-memory datasets, holding the content of every file by path."""
+
+    def __init__(self):
+        self.files = {}
+        self.dirs = {"Models"}
+        self._lock = threading.Lock()
+
+    def _put(self, path, content):
+        with self._lock:
+            self.files[path] = content
+
+    def path_exists(self, remote_path):
+        return remote_path in self.files or remote_path in self.dirs
+
+    def mkdir(self, remote_path):
+        if self.path_exists(remote_path):
+            raise RestAPIError("mkdir", FakeResponse())
+        self.dirs.add(remote_path)
+
+    def rm(self, remote_path):
+        def removed(path):
+            return path == remote_path or path.startswith(remote_path + "/")
+
+        with self._lock:
+            self.files = {p: c for p, c in self.files.items() if not removed(p)}
+            self.dirs = {p for p in self.dirs if not removed(p)}
+
+    def upload(self, local_path, upload_path, **kwargs):
+        with open(local_path, "rb") as f:
+            self._put(upload_path + "/" + os.path.basename(local_path), f.read())
+
+    @contextlib.contextmanager
+    def upload_stream(self, upload_path, file_name, size, **kwargs):
+        stream = io.BytesIO()
+        yield stream
+        self._put(upload_path + "/" + file_name, stream.getvalue())
+
+    def copy(self, source_path, destination_path):
+        self._put(destination_path, self.files[source_path])
+
+    def read(self, remote_path):
+        return self.files[remote_path]
+
+    def unzip(self, remote_path, block=False, timeout=120, target_path=None):
+        # extracted into the directory named after the archive, existing or not
+        extract_path = remote_path[: -len(".zip")]
+        with zipfile.ZipFile(io.BytesIO(self.files[remote_path])) as zf:
+            for info in zf.infolist():
+                path = extract_path + "/" + info.filename.rstrip("/")
+                if info.is_dir():
+                    self.dirs.add(path)
+                else:
+                    self._put(path, zf.read(info))
+
+    def list_files(self, remote_path, limit=1000):
+        entries = [
+            (path[len(remote_path) + 1 :], True, None)
+            for path in self.dirs
+            if path.startswith(remote_path + "/")
+        ] + [
+            (path[len(remote_path) + 1 :], False, len(content))
+            for path, content in self.files.items()
+            if path.startswith(remote_path + "/")
+        ]
+        return sorted(entries, key=lambda entry: entry[0].count("/"))
+
+    def download(self, path, local_path, **kwargs):
+        with open(local_path, "wb") as f:
+            f.write(self.files[path])
+
+
+class FakeModelsApi:
+    def __init__(self):
+        self.registered = {}
+
+    def put(self, model_instance, query_params):
+        self.registered[(model_instance._name, model_instance._version)] = True
+
+    def get_latest_version(self, name):
+        versions = [v for (n, v) in self.registered if n == name]
+        return max(versions, default=0)
+
+
+class FakeClient:
+    _project_name = "project"
+    _upload_concurrency = 4
+    _download_concurrency = 1
+
+
+@pytest.fixture
+def engine(monkeypatch, tmp_path):
+    monkeypatch.setenv("IS_LOCAL_TEST", "true")
+    monkeypatch.setattr(client, "get_instance", lambda: FakeClient())
+    monkeypatch.chdir(tmp_path)
+    engine = models_engine.Engine()
+    engine._dataset_api = FakeDatasetApi()
+    engine._engine._dataset_api = engine._dataset_api
+    engine._models_api = FakeModelsApi()
+    return engine
+
+
+def write_model(path, files):
+    for relative_path, content in files.items():
+        file_path = os.path.join(path, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as f:
+            f.write(content)
+
+
+def stored_manifest(engine, version):
+    return json.loads(
+        engine._dataset_api.files[
+            "Models/mnist/{}/{}".format(version, engine.MANIFEST_FILE_NAME)
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "upload_mode,parent_version",
+    [("archive", None), ("stream", None), ("files", None), ("archive", 1)],
+)
+def test_save_from_downloaded_directory_stores_fresh_manifest(
+    engine, tmp_path, upload_mode, parent_version
+):
+    model_path = str(tmp_path / "model")
+    write_model(model_path, {"a.bin": b"a" * 2000, "sub/b.txt": b"b"})
+    engine.save(Model(None, "mnist", version=1), model_path, await_registration=0)
+
+    downloaded_path = engine.download(
+        Model(None, "mnist", version=1),
+        download_mode="files",
+        local_path=str(tmp_path / "downloads"),
+    )
+    assert os.path.isfile(os.path.join(downloaded_path, engine.MANIFEST_FILE_NAME))
+
+    write_model(downloaded_path, {"a.bin": b"a" * 11})
+    engine.save(
+        Model(None, "mnist", version=2),
+        downloaded_path,
+        await_registration=0,
+        upload_mode=upload_mode,
+        parent_version=parent_version,
+    )
+
+    assert stored_manifest(engine, 2)["files"] == {
+        "a.bin": {"size": 11, "sha256": util.file_sha256(downloaded_path + "/a.bin")},
+        "sub/b.txt": stored_manifest(engine, 1)["files"]["sub/b.txt"],
+    }
+    assert engine._dataset_api.files["Models/mnist/2/a.bin"] == b"a" * 11
+
+
+def save_and_download_v1(engine, tmp_path):
+    model_path = str(tmp_path / "model")
+    write_model(model_path, {"a.bin": b"a" * 2000, "sub/b.txt": b"b"})
+    engine.save(Model(None, "mnist", version=1), model_path, await_registration=0)
+    return engine.download(
+        Model(None, "mnist", version=1),
+        download_mode="files",
+        local_path=str(tmp_path / "downloads"),
+    )
+
+
+def copy_version(dataset_api, version, new_version):
+    version_path = "Models/mnist/{}".format(version)
+    new_version_path = "Models/mnist/{}".format(new_version)
+    for path in list(dataset_api.dirs):
+        if path == version_path or path.startswith(version_path + "/"):
+            dataset_api.dirs.add(new_version_path + path[len(version_path) :])
+    for path, content in list(dataset_api.files.items()):
+        if path.startswith(version_path + "/"):
+            dataset_api.files[new_version_path + path[len(version_path) :]] = content
+
+
+def test_download_next_to_local_version_ignores_manifest_of_other_size(
+    engine, tmp_path
+):
+    save_and_download_v1(engine, tmp_path)
+    # saved with the manifest of version 1, although a.bin changed
+    copy_version(engine._dataset_api, 1, 2)
+    engine._dataset_api.files["Models/mnist/2/a.bin"] = b"a" * 11
+
+    downloaded_path = engine.download(
+        Model(None, "mnist", version=2),
+        download_mode="files",
+        local_path=str(tmp_path / "downloads"),
+    )
+
+    with open(os.path.join(downloaded_path, "a.bin"), "rb") as f:
+        assert f.read() == b"a" * 11
+    with open(os.path.join(downloaded_path, "sub", "b.txt"), "rb") as f:
+        assert f.read() == b"b"
+
+
+def test_download_next_to_local_version_ignores_modified_local_file(engine, tmp_path):
+    v1_path = save_and_download_v1(engine, tmp_path)
+    copy_version(engine._dataset_api, 1, 2)
+    write_model(v1_path, {"a.bin": b"z" * 2000})
+
+    downloaded_path = engine.download(
+        Model(None, "mnist", version=2),
+        download_mode="files",
+        local_path=str(tmp_path / "downloads"),
+    )
+
+    with open(os.path.join(downloaded_path, "a.bin"), "rb") as f:
+        assert f.read() == b"a" * 2000